@@ -1,109 +1,313 @@
 # streamlit_app.py
-import os
-import json
 import streamlit as st
 import asyncio
-from utils.scraper import fetch_profile, evaluate_job_descriptions
+from datetime import datetime
+from utils.scraper import fetch_profile
+from utils.job_market import EXP_LEVELS, get_job_summary, start_background_refresher
 from utils.llm_chain import get_langgraph_app
+from utils.cache import cache_mode, cache_stats
+from utils.results_store import RESULT_KEYS, get_results_store, load_previous
+from utils.role_compare import COMPARE_MAX_TARGETS, COMPARE_TOP_K, compare_roles, unique_targets
+from utils.telemetry import trace
+from utils import api_client
+from utils.api_client import OPTIMIZER_API_URL
 
 st.set_page_config(page_title="LinkedIn Optimizer", layout="centered")
+# With OPTIMIZER_API_URL set, the app is a thin client of the optimizer service, which does all scraping and LLM work.
+if not OPTIMIZER_API_URL:
+    start_background_refresher()
 st.title("🤖 LinkedIn Profile Optimizer")
 
 st.write("Paste your LinkedIn profile URL below to get a full analysis:")
 email = st.text_input("📧 Enter your Email", placeholder="you@example.com")
 PROFILE_URL = st.text_input("LinkedIn URL", placeholder="https://www.linkedin.com/in/...")
-target_role = st.text_input("Target Job Role", placeholder="e.g., AI Developer,Product Manager,Data Scientist, etc.")
-exp_level = st.selectbox("Experience Level", ["internship", "entry_level", "associate","mid_senior_level","director"], index=2)
+# Comparison runs scraping and LLM calls in this process, so it is only offered when the app is not a service client.
+compare_mode = not OPTIMIZER_API_URL and st.radio("Mode", ["Optimize for one role", "Compare roles"], horizontal=True) == "Compare roles"
+if compare_mode:
+    compare_role_text = st.text_area("Target Job Roles (one per line)", placeholder="AI Developer\nData Scientist\nProduct Manager")
+    compare_levels = st.multiselect("Experience Levels", EXP_LEVELS, default=[EXP_LEVELS[2]])
+    compare_top_k = st.number_input("Fully optimize the top K roles", min_value=0, max_value=COMPARE_MAX_TARGETS, value=COMPARE_TOP_K)
+    target_role, exp_level = "", EXP_LEVELS[2]
+else:
+    target_role = st.text_input("Target Job Role", placeholder="e.g., AI Developer,Product Manager,Data Scientist, etc.")
+    exp_level = st.selectbox("Experience Level", EXP_LEVELS, index=2)
+stream_output = st.checkbox("Stream results as they are generated", value=True)
+regenerate = st.checkbox("Regenerate answers (re-fetch the profile and ignore cached LLM responses)", value=False)
+show_timings = False if OPTIMIZER_API_URL else st.checkbox("Show timing breakdown", value=False)
+
+SECTION_TITLES = {
+    "analysis": "1. Profile Analysis 📝",
+    "fit": "2. Job Fit Analysis 🤝",
+    "rewrite": "3. Rewritten LinkedIn Sections ✍️",
+    "counseling": "4. Career Counseling & Skill Gap Advice 🎯",
+}
 
 
 async def fetch_all_data(linkedin_id, target_role):
     # Asynchronously fetches both LinkedIn profile data and relevant job descriptions.
     # Utilizes asyncio event loop to concurrently execute profile and job data retrieval.
+    # The worker threads run in a copy of the current context, so their telemetry spans join the active trace.
     # Returns a tuple containing profile data and job description analysis.
-    loop = asyncio.get_event_loop()
-    profile_task = loop.run_in_executor(None, fetch_profile, linkedin_id)
-    jobs_task = loop.run_in_executor(None, evaluate_job_descriptions, target_role, exp_level)
+    profile_task = asyncio.to_thread(fetch_profile, linkedin_id)
+    jobs_task = asyncio.to_thread(get_job_summary, target_role, exp_level)
     profile_data, job_data = await asyncio.gather(profile_task, jobs_task)
     return profile_data, job_data
 
-def get_saved_result(email_id):
-    # Retrieves previously saved optimization results for a given email ID.
-    # Loads the results from a local JSON file if it exists and returns the result for the specified email.
-    # Returns None if no result is found.
-    file_path = "linkedin_optimizer_results.json"
-    if os.path.exists(file_path):
-        with open(file_path, "r") as f:
-            all_results = json.load(f)
-        return all_results.get(email_id)
-    return None
+def stream_optimizer(events):
+    # Renders every section token by token as it is generated, from (mode, chunk) pairs produced either by
+    # compiled.stream(..., stream_mode=["custom", "updates", "values"]) or by the optimizer service's event stream.
+    # Token chunks arrive on the "custom" stream; node completions arrive on the "updates" stream and drive the progress indicators.
+    # Returns the last "values" chunk, i.e. the run's final state (None for the service's stream).
+    progress = st.progress(0.0, text="Running LinkedIn Optimizer...")
+    statuses, bodies, buffers = {}, {}, {}
+    for node, title in SECTION_TITLES.items():
+        st.markdown(f"### {title}")
+        statuses[node] = st.empty()
+        statuses[node].caption("⏳ Waiting...")
+        bodies[node] = st.empty()
+        buffers[node] = ""
 
-def save_result(email_id, result):
-    # Persists the optimization result for a given email ID to a local JSON file.
-    # Loads existing results, updates or adds the new result, and writes back to disk.
-    file_path = "linkedin_optimizer_results.json"
-    all_results = {}
-    if os.path.exists(file_path):
-        with open(file_path, "r") as f:
-            all_results = json.load(f)
-    all_results[email_id] = result
-    with open(file_path, "w") as f:
-        json.dump(all_results, f, indent=4)
-        
-if st.button("Load Previous"):
-    if not email:
-        st.error("Please enter your email.")
-    else:
-        compiled = get_langgraph_app()
-        
-        # 1️⃣ Get the latest snapshot (most recent checkpoint for this thread_id)
-        snapshot = compiled.get_state(
-            config={"configurable": {"thread_id": email}}
-        )
-        
-        if snapshot is None:
-            st.warning("No previous data found.")
+    done = set()
+    final = None
+    for mode, chunk in events:
+        if mode == "values":
+            final = chunk
+            continue
+        if mode == "updates" and "plan" in chunk:
+            # Sections whose inputs did not change since the last run are reused and arrive all at once.
+            update = chunk["plan"]
+            for node in update["run_plan"]["reused"]:
+                done.add(node)
+                score = f" · Match score {update['fit_score']['score']}/100" if node == "fit" and update.get("fit_score") else ""
+                statuses[node].caption(f"♻️ Reused · inputs unchanged since the last run{score}")
+                bodies[node].markdown(update[node])
+            progress.progress(len(done) / len(SECTION_TITLES), text=f"Completed {len(done)}/{len(SECTION_TITLES)} sections")
+            continue
+        if mode == "custom":
+            node = chunk["node"]
+            if not buffers[node]:
+                statuses[node].caption("✍️ Generating...")
+            buffers[node] += chunk["token"]
+            bodies[node].markdown(buffers[node] + "▌")
         else:
-            st.success("🧠 Loaded latest result")
-
-            # Display the content of each graph node
-            for section in ["analysis", "fit", "rewrite", "counseling"]:
-                st.markdown(f"### {section.capitalize()}")
-                st.write(snapshot.values[section])
-
-            cp = snapshot.config["configurable"].get("checkpoint_id")
-            ts = snapshot.created_at
-            st.caption(f"(Checkpoint ID: {cp}, created at {ts})")
-            
-if st.button("Analyze Profile") and PROFILE_URL and target_role:
-    if not (email and PROFILE_URL and target_role):
-        st.error("Fill all fields first!")
-    with st.spinner("Fetching profile and jobs..."):
-        profile_data, job_data = asyncio.run(fetch_all_data(PROFILE_URL, target_role))
+            for node, update in chunk.items():
+                if node not in SECTION_TITLES:
+                    continue
+                done.add(node)
+                if update.get("fit_score"):
+                    statuses[node].caption(f"✅ Done · Match score {update['fit_score']['score']}/100")
+                else:
+                    statuses[node].caption("✅ Done")
+                bodies[node].markdown(update[node])
+                progress.progress(len(done) / len(SECTION_TITLES), text=f"Completed {len(done)}/{len(SECTION_TITLES)} sections")
+    progress.empty()
+    return final
+
+def show_inputs(profile_data, job_data):
     st.subheader("✅ Profile Data Retrieved")
     st.write(profile_data)
     st.subheader("🔍 Job Description Analysis")
     st.write(job_data)
 
+def show_sections(result):
+    # Renders the finished sections at once (non-streaming mode).
+    reused = (result.get("run_plan") or {}).get("reused", [])
+    for node, title in SECTION_TITLES.items():
+        st.markdown(f"### {title}")
+        if node in reused:
+            st.caption("♻️ Reused · inputs unchanged since the last run")
+        if node == "fit" and result.get("fit_score"):
+            st.caption(f"Match score {result['fit_score']['score']}/100")
+        st.write(result[node])
+
+def show_run_plan(run_plan):
+    # Summarizes which sections this run recomputed and which it reused from the previous run for this email.
+    if not run_plan or not run_plan["reused"]:
+        return
+    recomputed = ", ".join(SECTION_TITLES[node].split(" ", 1)[1] for node in run_plan["recomputed"]) or "nothing"
+    reused = ", ".join(SECTION_TITLES[node].split(" ", 1)[1] for node in run_plan["reused"])
+    changed = ", ".join(run_plan["changed_sections"]) or "none"
+    st.info(f"Recomputed: {recomputed}. Reused: {reused}. Changed inputs: {changed}.")
+
+def show_previous(previous):
+    # Renders a previous result as returned by load_previous (locally or from the service), with older results in an expander.
+    if previous is None:
+        st.warning("No previous data found.")
+        return
+    st.success("🧠 Loaded latest result" if previous["source"] == "checkpoint" else "🧠 Loaded latest saved result")
+    for section in ["analysis", "fit", "rewrite", "counseling"]:
+        st.markdown(f"### {section.capitalize()}")
+        st.write(previous["result"].get(section))
+    if previous.get("checkpoint_id"):
+        st.caption(f"(Checkpoint ID: {previous['checkpoint_id']}, created at {previous['created_at']})")
+
+    history = previous["history"]
+    if len(history) > 1:
+        with st.expander(f"Previous results ({len(history) - 1})"):
+            for entry in history[1:]:
+                created = datetime.fromtimestamp(entry["created_at"]).strftime("%Y-%m-%d %H:%M")
+                st.markdown(f"#### Result from {created}")
+                for section in ["analysis", "fit", "rewrite", "counseling"]:
+                    st.markdown(f"**{section.capitalize()}**")
+                    st.write(entry["result"].get(section))
+
+def analyze_local():
+    # Fetches the inputs and runs the optimizer graph in this process, then saves the result and prunes old checkpoints.
+    # Returns the final graph state.
+    with st.spinner("Fetching profile and jobs..."), cache_mode("refresh" if regenerate else "use"):
+        profile_data, job_data = asyncio.run(fetch_all_data(PROFILE_URL, target_role))
+    show_inputs(profile_data, job_data)
+
+    compiled = get_langgraph_app()
+    config = {"configurable": {"thread_id": email}}
+    inputs = {"profile": profile_data, "job_desc": job_data}
+
+    st.subheader("🧠 Full LinkedIn Optimization Results")
+
+    with cache_mode("refresh" if regenerate else "use"):
+        if stream_output:
+            # This run's own final state; the thread's latest checkpoint may already belong to a later run.
+            result = stream_optimizer(compiled.stream(inputs, config=config, stream_mode=["custom", "updates", "values"]))
+        else:
+            with st.spinner("Running LinkedIn Optimizer..."):
+                result = compiled.invoke(inputs, config=config)
+            show_sections(result)
+
+    save_result(email, {key: result.get(key) for key in RESULT_KEYS})
+
+    # Apply the checkpoint retention policy to this user's thread so the DB doesn't grow without bound.
+    compiled.checkpointer.prune(email)
+    return result
+
+def analyze_remote():
+    # Submits the analysis to the optimizer service and renders its progress; the service saves the result.
+    # Identical requests already running on the service are joined instead of started again.
+    # Returns the final result.
+    job = api_client.submit_analysis(email, PROFILE_URL, target_role, exp_level, regenerate)
+    if job.get("coalesced"):
+        st.info("An identical analysis is already running; showing its progress.")
+    with st.spinner("Fetching profile and jobs..."):
+        api_client.wait_for_job(job["job_id"], states=("running", "done"))
+    # The service doesn't return the fetched inputs, only the results.
+    st.success("✅ Profile and job descriptions retrieved by the optimizer service")
+
+    st.subheader("🧠 Full LinkedIn Optimization Results")
+
+    if stream_output:
+        stream_optimizer(api_client.stream_job(job["job_id"]))
+        return api_client.wait_for_job(job["job_id"])["result"]
     with st.spinner("Running LinkedIn Optimizer..."):
-        compiled = get_langgraph_app()
-        result = compiled.invoke(
+        result = api_client.wait_for_job(job["job_id"])["result"]
+    show_sections(result)
+    return result
+
+def render_timing_breakdown(run_trace):
+    # Shows every span of the run (scraper calls, HTTP requests, graph nodes, LLM calls) nested under its parent,
+    # with durations, token counts, estimated cost, retries and cache hits, plus run totals.
+    rows = run_trace.rows()
+    depth = {}
+    table = []
+    for row in rows:
+        level = depth[row["span_id"]] = depth.get(row["parent_id"], -1) + 1
+        table.append({
+            "step": ("  " * (level - 1) + "↳ " if level else "") + row["name"],
+            "kind": row["kind"],
+            "ms": row["duration_ms"],
+            "prompt tokens": row.get("prompt_tokens"),
+            "completion tokens": row.get("completion_tokens"),
+            "cost ($)": row.get("cost_usd"),
+            "cache hit": row.get("cache_hit"),
+            "retries": row.get("retries"),
+        })
+    totals = run_trace.totals()
+    with st.expander("⏱️ Timing breakdown"):
+        st.caption(
+            f"Total {totals['wall_s']:.2f}s · {totals.get('prompt_tokens', 0)} prompt / {totals.get('completion_tokens', 0)} completion tokens"
+            f" · ~${totals.get('cost_usd', 0):.4f} · {totals.get('cache_hits', 0)} cache hits · {totals.get('retries', 0)} retries"
+        )
+        st.caption("Cache hit rate since the app started: " + " · ".join(
+            f"{name} {stats['hit_rate']:.0%} ({stats['entries']} entries)" for name, stats in cache_stats().items()
+        ))
+        st.dataframe(table, use_container_width=True)
+
+def render_comparison(comparison):
+    # Ranked fit table for every compared role, the shared profile analysis, then the full results of the top roles.
+    st.subheader("📊 Role Comparison")
+    st.dataframe([
         {
-        "profile": profile_data,
-        "job_desc": job_data
-        },
-    config={"configurable": {"thread_id": email}}
-)
+            "rank": row["rank"],
+            "role": row["target_role"],
+            "experience level": row["exp_level"],
+            "score": row["score"],
+            "skill coverage": row["fit_score"]["skill_coverage"] if row["fit_score"] else None,
+            "text similarity": row["fit_score"]["text_similarity"] if row["fit_score"] else None,
+            "missing skills": ", ".join(row["fit_score"]["missing_skills"][:5]) if row["fit_score"] else "",
+            "status": row["error"] or ("optimized" if row.get("counseling") else "scored"),
+        }
+        for row in comparison["roles"]
+    ], use_container_width=True, hide_index=True)
 
-    st.subheader("🧠 Full LinkedIn Optimization Results")
+    st.markdown(f"### {SECTION_TITLES['analysis']}")
+    st.caption("Shared by every compared role")
+    st.write(comparison["analysis"])
+
+    for row in comparison["roles"]:
+        if not row.get("counseling"):
+            continue
+        with st.expander(f"#{row['rank']} {row['target_role']} ({row['exp_level']}) · Match score {row['score']}/100", expanded=row["rank"] == 1):
+            for node in ("fit", "rewrite", "counseling"):
+                st.markdown(f"#### {SECTION_TITLES[node]}")
+                st.write(row[node])
 
-    st.markdown("### 1. Profile Analysis 📝")
-    st.write(result["analysis"])
+def save_result(email_id, result):
+    # Atomically appends the optimization result for a given email ID to the results store and marks it as the latest.
+    get_results_store().save(email_id, result)
+
+if st.button("Load Previous"):
+    if not email:
+        st.error("Please enter your email.")
+    elif OPTIMIZER_API_URL:
+        show_previous(api_client.load_previous(email))
+    else:
+        # The latest checkpoint for this thread_id wins; the results store covers threads without checkpoints.
+        show_previous(load_previous(get_langgraph_app(), email))
+
+if compare_mode and st.button("Compare Roles"):
+    targets = unique_targets((role, level) for role in compare_role_text.splitlines() for level in compare_levels)
+    if not (PROFILE_URL and targets):
+        st.error("Enter your LinkedIn URL, at least one role and one experience level.")
+    elif len(targets) > COMPARE_MAX_TARGETS:
+        st.error(f"Compare at most {COMPARE_MAX_TARGETS} role and experience level combinations at once.")
+    else:
+        with trace("compare") as run_trace:
+            with st.spinner(f"Comparing {len(targets)} roles..."), cache_mode("refresh" if regenerate else "use"):
+                try:
+                    comparison = compare_roles(PROFILE_URL, targets, top_k=int(compare_top_k))
+                except RuntimeError as e:
+                    st.error(str(e))
+                    st.stop()
+        render_comparison(comparison)
+        if show_timings:
+            render_timing_breakdown(run_trace)
+
+if not compare_mode and st.button("Analyze Profile") and PROFILE_URL and target_role:
+    if not (email and PROFILE_URL and target_role):
+        st.error("Fill all fields first!")
+    if OPTIMIZER_API_URL:
+        try:
+            result = analyze_remote()
+        except api_client.ServiceError as e:
+            st.error(f"Optimizer service error: {e}")
+            st.stop()
+    else:
+        # Every scraper call, node and LLM call of this run is recorded as a telemetry span for the timing breakdown.
+        with trace("analyze") as run_trace:
+            result = analyze_local()
 
-    st.markdown("### 2. Job Fit Analysis 🤝")
-    st.write(result["fit"])
+    show_run_plan(result.get("run_plan"))
 
-    st.markdown("### 3. Rewritten LinkedIn Sections ✍️")
-    st.write(result["rewrite"])
+    if result.get("prompt_tokens"):
+        st.caption("Prompt input tokens per node: " + ", ".join(f"{node} {count}" for node, count in result["prompt_tokens"].items()))
 
-    st.markdown("### 4. Career Counseling & Skill Gap Advice 🎯")
-    st.write(result["counseling"])
\ No newline at end of file
+    if show_timings:
+        render_timing_breakdown(run_trace)
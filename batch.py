@@ -0,0 +1,222 @@
+"""
+Headless batch optimizer.
+
+Optimizes every profile in a CSV with columns email, profile_url, target_role and (optionally) exp_level,
+without the Streamlit UI. Rows that share a role and experience level share one job summary, profiles and
+graph runs go through a worker pool, and ScrapingDog and LLM calls are held to global request rates.
+
+Each email keeps its checkpoint thread, tagged with a fingerprint of its row. Re-running the same CSV after a
+crash skips rows whose run already finished and resumes interrupted runs from their last checkpoint.
+
+    python batch.py profiles.csv --workers 8 --scrapingdog-rps 2 --llm-rps 5
+    python batch.py profiles.csv --force --report report.json   # re-run finished rows too
+"""
+import argparse
+import csv
+import json
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import xxhash
+
+from utils.cache import cache_mode
+from utils.checkpoint_store import CHECKPOINT_DB_PATH, PooledSqliteSaver
+from utils.job_market import EXP_LEVELS, get_job_summary, normalize_role
+from utils.llm_chain import build_graph
+from utils.rate_limit import llm_limiter, scrapingdog_limiter
+from utils.results_store import RESULT_KEYS, get_results_store
+from utils.scraper import fetch_profile
+from utils.telemetry import percentiles
+
+DEFAULT_EXP_LEVEL = "associate"
+
+
+def load_rows(path):
+    """
+    Reads and validates the input CSV. Returns (rows, errors); when an email appears more than once,
+    its last row wins so that one checkpoint thread is never driven by two workers.
+    """
+    rows, errors = {}, []
+    with open(path, newline="") as f:
+        for line, raw in enumerate(csv.DictReader(f), start=2):
+            row = {k.strip().lower(): (v or "").strip() for k, v in raw.items() if k}
+            row["exp_level"] = row.get("exp_level") or DEFAULT_EXP_LEVEL
+            missing = [k for k in ("email", "profile_url", "target_role") if not row.get(k)]
+            if missing:
+                errors.append({"line": line, "error": f"missing {', '.join(missing)}"})
+            elif row["exp_level"] not in EXP_LEVELS:
+                errors.append({"line": line, "error": f"unknown exp_level {row['exp_level']!r}"})
+            else:
+                rows[row["email"]] = row
+    return list(rows.values()), errors
+
+
+def row_fingerprint(row):
+    # Identifies the inputs of a row, so a checkpoint only counts as this row's run if nothing changed since.
+    return xxhash.xxh3_64_hexdigest(f"{row['profile_url']}|{normalize_role(row['target_role'])}|{row['exp_level']}")
+
+
+def checkpoint_status(compiled, row):
+    """
+    Returns "done" if the email's latest checkpoint is a finished run of this row, "interrupted" if it is an
+    unfinished one, or "new" if there is no run of this row.
+    """
+    snapshot = compiled.get_state({"configurable": {"thread_id": row["email"]}})
+    if not snapshot.values or (snapshot.metadata or {}).get("batch_row") != row_fingerprint(row):
+        return "new"
+    return "interrupted" if snapshot.next else "done"
+
+
+class BatchRunner:
+    """
+    Drives the optimizer for many rows: one job summary per (role, exp_level) group, then one worker-pool task
+    per row that fetches the profile, runs (or resumes) the graph, saves the result and prunes the thread.
+    """
+
+    def __init__(self, db_path=CHECKPOINT_DB_PATH, workers=4, mode="use", force=False):
+        self.compiled = build_graph().compile(checkpointer=PooledSqliteSaver(db_path))
+        self.workers = workers
+        self.mode = mode
+        self.force = force
+        self.timings = defaultdict(list)
+        self.errors = []
+        self.counts = defaultdict(int)
+
+    def _record(self, stage, started):
+        self.timings[stage].append(time.perf_counter() - started)
+
+    def _fail(self, row, stage, error):
+        self.counts["failed"] += 1
+        self.errors.append({"email": row["email"], "stage": stage, "error": str(error)})
+
+    def _summary(self, role, exp_level):
+        started = time.perf_counter()
+        with cache_mode(self.mode):
+            summary = get_job_summary(role, exp_level)
+        self._record("job_summary", started)
+        return summary
+
+    def _optimize(self, row, job_desc=None):
+        # Runs one row end to end; job_desc is None when an interrupted run is resumed from its checkpoint.
+        started = time.perf_counter()
+        config = {"configurable": {"thread_id": row["email"]}, "metadata": {"batch_row": row_fingerprint(row)}}
+        with cache_mode(self.mode):
+            if job_desc is None:
+                inputs = None
+            else:
+                stage_started = time.perf_counter()
+                profile = fetch_profile(row["profile_url"])
+                self._record("fetch_profile", stage_started)
+                if not profile:
+                    raise RuntimeError("profile fetch failed")
+                inputs = {"profile": profile, "job_desc": job_desc}
+            stage_started = time.perf_counter()
+            result = self.compiled.invoke(inputs, config=config)
+            self._record("graph", stage_started)
+        get_results_store().save(row["email"], {key: result.get(key) for key in RESULT_KEYS})
+        self.compiled.checkpointer.prune(row["email"])
+        self._record("row", started)
+
+    def run(self, rows):
+        """
+        Optimizes every row and returns the throughput/latency report.
+        """
+        started = time.perf_counter()
+        groups, resume = defaultdict(list), []
+        for row in rows:
+            status = "new" if self.force else checkpoint_status(self.compiled, row)
+            if status == "done":
+                self.counts["skipped"] += 1
+            elif status == "interrupted":
+                resume.append(row)
+            else:
+                groups[(normalize_role(row["target_role"]), row["exp_level"])].append(row)
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="batch") as pool:
+            row_futures = {pool.submit(self._optimize, row): (row, "resumed") for row in resume}
+            # Summaries are built first; each group's rows are queued as soon as its summary is ready.
+            summary_futures = {
+                pool.submit(self._summary, group_rows[0]["target_role"], exp_level): group_rows
+                for (_, exp_level), group_rows in groups.items()
+            }
+            for future in as_completed(summary_futures):
+                group_rows = summary_futures[future]
+                try:
+                    summary = future.result()
+                    if not summary:
+                        raise RuntimeError("job summary extraction failed")
+                except Exception as e:
+                    for row in group_rows:
+                        self._fail(row, "job_summary", e)
+                    continue
+                for row in group_rows:
+                    row_futures[pool.submit(self._optimize, row, summary)] = (row, "completed")
+            for future in as_completed(row_futures):
+                row, outcome = row_futures[future]
+                try:
+                    future.result()
+                    self.counts[outcome] += 1
+                except Exception as e:
+                    self._fail(row, "optimize", e)
+        wall = time.perf_counter() - started
+
+        processed = self.counts["completed"] + self.counts["resumed"]
+        return {
+            "rows": len(rows),
+            "role_groups": len(groups),
+            "completed": self.counts["completed"],
+            "resumed": self.counts["resumed"],
+            "skipped": self.counts["skipped"],
+            "failed": self.counts["failed"],
+            "wall_s": round(wall, 3),
+            "profiles_per_min": round(60 * processed / wall, 2) if wall else None,
+            "row_latency": percentiles(self.timings["row"]),
+            "stages": {stage: percentiles(self.timings[stage]) for stage in ("job_summary", "fetch_profile", "graph")},
+            "errors": self.errors,
+        }
+
+
+def print_report(report):
+    print(
+        f"{report['rows']} rows in {report['role_groups']} role groups: {report['completed']} completed, "
+        f"{report['resumed']} resumed, {report['skipped']} already done, {report['failed']} failed"
+    )
+    print(f"Wall time {report['wall_s']}s, {report['profiles_per_min']} profiles/min")
+    for name, stats in [("row", report["row_latency"]), *report["stages"].items()]:
+        if stats:
+            print(f"  {name:<14} n={stats['count']:<5} p50 {stats['p50_s']}s  p95 {stats['p95_s']}s  max {stats['max_s']}s")
+    for error in report["errors"]:
+        print(f"  FAILED {error.get('email', 'line ' + str(error.get('line')))}: {error['error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("csv", help="input CSV with email, profile_url, target_role and optional exp_level columns")
+    parser.add_argument("--workers", type=int, default=4, help="profiles optimized concurrently")
+    parser.add_argument("--scrapingdog-rps", type=float, default=None, help="ScrapingDog requests per second (0 = unlimited)")
+    parser.add_argument("--llm-rps", type=float, default=None, help="LLM calls per second (0 = unlimited)")
+    parser.add_argument("--db", default=CHECKPOINT_DB_PATH, help="checkpoint DB (default: %(default)s)")
+    parser.add_argument("--force", action="store_true", help="re-run rows whose previous run already finished (sections whose inputs are unchanged are still reused; add --regenerate to recompute them)")
+    parser.add_argument("--regenerate", action="store_true", help="re-fetch profiles and ignore cached LLM responses")
+    parser.add_argument("--report", default=None, help="also write the report as JSON to this path")
+    args = parser.parse_args()
+
+    if args.scrapingdog_rps is not None:
+        scrapingdog_limiter.configure(args.scrapingdog_rps)
+    if args.llm_rps is not None:
+        llm_limiter.configure(args.llm_rps)
+
+    rows, errors = load_rows(args.csv)
+    runner = BatchRunner(args.db, args.workers, "refresh" if args.regenerate else "use", args.force)
+    runner.errors.extend(errors)
+    report = runner.run(rows)
+    report["invalid_rows"] = len(errors)
+    print_report(report)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
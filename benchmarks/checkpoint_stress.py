@@ -0,0 +1,146 @@
+"""
+Checkpoint store stress test.
+
+Runs dozens of simultaneous thread_ids through a graph shaped like the optimizer (analysis, fit and rewrite in
+parallel, joined by counseling) against a checkpoint DB, and reports checkpoint write latency percentiles.
+Nodes echo fixed-size text instead of calling an LLM, so only the checkpoint store is measured.
+
+    python -m benchmarks.checkpoint_stress --threads 50 --runs 3
+    python -m benchmarks.checkpoint_stress --saver shared   # previous single shared-connection SqliteSaver
+"""
+import argparse
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TypedDict
+
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.graph import START, StateGraph
+
+from utils.checkpoint_store import CHECKPOINT_DB_PATH, PooledSqliteSaver
+from utils.telemetry import percentiles
+
+
+class StressState(TypedDict):
+    profile: object
+    job_desc: dict
+    analysis: str
+    fit: str
+    rewrite: str
+    counseling: str
+
+
+def _timed(saver_cls):
+    # Wraps a saver class so every put/put_writes call records its wall time.
+    class TimedSaver(saver_cls):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.latencies = {"put": [], "put_writes": []}
+            self._latency_lock = threading.Lock()
+
+        def _record(self, kind, started):
+            with self._latency_lock:
+                self.latencies[kind].append(time.perf_counter() - started)
+
+        def put(self, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return super().put(*args, **kwargs)
+            finally:
+                self._record("put", started)
+
+        def put_writes(self, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return super().put_writes(*args, **kwargs)
+            finally:
+                self._record("put_writes", started)
+
+    return TimedSaver
+
+
+def make_saver(kind, db_path):
+    if kind == "shared":
+        return _timed(SqliteSaver)(sqlite3.connect(db_path, check_same_thread=False))
+    return _timed(PooledSqliteSaver)(db_path)
+
+
+def build_stress_graph(output_chars):
+    text = "x" * output_chars
+    graph = StateGraph(StressState)
+    for name in ("analysis", "fit", "rewrite"):
+        graph.add_node(name, lambda state, name=name: {name: text})
+        graph.add_edge(START, name)
+    graph.add_node("counseling", lambda state: {"counseling": text})
+    graph.add_edge(["analysis", "fit", "rewrite"], "counseling")
+    graph.set_finish_point("counseling")
+    return graph
+
+
+def run_stress(db_path=CHECKPOINT_DB_PATH, saver_kind="pooled", threads=50, runs=3, output_chars=3000,
+               profile_path="profile.json", keep=False):
+    """
+    Runs threads x runs graph invocations concurrently, each thread on its own thread_id.
+    Returns a report with checkpoint write latency percentiles, errors and throughput.
+    The stress thread_ids are deleted afterwards unless keep is set.
+    """
+    with open(profile_path) as f:
+        profile = json.load(f)
+    inputs = {"profile": profile, "job_desc": {"skills": ["Python"] * 50}}
+    saver = make_saver(saver_kind, db_path)
+    app = build_stress_graph(output_chars).compile(checkpointer=saver)
+    prefix = f"stress-{uuid.uuid4().hex[:8]}"
+    thread_ids = [f"{prefix}-{i}" for i in range(threads)]
+    errors = []
+
+    def worker(thread_id):
+        for _ in range(runs):
+            app.invoke(inputs, config={"configurable": {"thread_id": thread_id}})
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        futures = [executor.submit(worker, thread_id) for thread_id in thread_ids]
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                errors.append(repr(e))
+    wall = time.perf_counter() - started
+
+    if not keep:
+        for thread_id in thread_ids:
+            saver.delete_thread(thread_id)
+
+    return {
+        "saver": saver_kind,
+        "db_path": db_path,
+        "threads": threads,
+        "runs_per_thread": runs,
+        "wall_s": round(wall, 3),
+        "runs_per_s": round(threads * runs / wall, 2) if wall else None,
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "put": percentiles(saver.latencies["put"], unit="ms"),
+        "put_writes": percentiles(saver.latencies["put_writes"], unit="ms"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=CHECKPOINT_DB_PATH, help="checkpoint DB to stress (default: %(default)s)")
+    parser.add_argument("--saver", choices=("pooled", "shared"), default="pooled")
+    parser.add_argument("--threads", type=int, default=50, help="simultaneous thread_ids")
+    parser.add_argument("--runs", type=int, default=3, help="graph runs per thread_id")
+    parser.add_argument("--output-chars", type=int, default=3000, help="size of each node's output")
+    parser.add_argument("--profile", default="profile.json", help="profile fixture used as graph input")
+    parser.add_argument("--keep", action="store_true", help="keep the stress checkpoints instead of deleting them")
+    args = parser.parse_args()
+    report = run_stress(args.db, args.saver, args.threads, args.runs, args.output_chars, args.profile, args.keep)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Offline stand-ins for the external services, used by the benchmark suite.
+
+- FakeScrapingDog: a local HTTP server answering the ScrapingDog endpoints used by utils.scraper. Profiles are
+  replayed from a fixture (profile.json); listings and job overviews are generated deterministically from the
+  request parameters, so repeated runs see identical data.
+- FakeLLM / FakeChatLLM: drop-in replacements for the completion LLM in utils.llm_chain and the chat LLM in
+  utils.scraper, with configurable latency and output length.
+"""
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.language_models.llms import LLM
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult, GenerationChunk
+
+SKILLS = (
+    "Python", "SQL", "Machine Learning", "Deep Learning", "PyTorch", "TensorFlow", "LangChain", "Docker",
+    "Kubernetes", "AWS", "Azure", "GCP", "Spark", "Airflow", "REST APIs", "FastAPI", "React", "TypeScript",
+    "Data Visualization", "Statistics", "NLP", "Computer Vision", "MLOps", "Git", "CI/CD", "Tableau",
+)
+RESPONSIBILITIES = (
+    "design and ship production models", "build data pipelines", "collaborate with product managers",
+    "own services end to end", "write technical documentation", "mentor junior engineers",
+    "run experiments and A/B tests", "monitor models in production", "present findings to stakeholders",
+)
+QUALIFICATIONS = (
+    "Bachelor's degree in Computer Science", "Master's degree in a quantitative field",
+    "3+ years of industry experience", "strong communication skills", "experience with cloud platforms",
+)
+
+
+class FakeScrapingDog:
+    """
+    Threaded HTTP server emulating /linkedin (profiles) and /linkedinjobs (listings and job overviews).
+    Every response waits latency seconds first; requests are counted per kind in stats.
+    """
+
+    def __init__(self, profile_path="profile.json", latency=0.2, listing_size=10, description_words=350):
+        with open(profile_path) as f:
+            self.profile = json.load(f)
+        self.latency = latency
+        self.listing_size = listing_size
+        self.description_words = description_words
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        self._server = None
+
+    def _count(self, kind):
+        with self._lock:
+            self.stats[kind] += 1
+
+    def job_overview(self, job_id):
+        # Builds a deterministic posting for job_id from the skill/responsibility/qualification vocabularies.
+        rng = random.Random(job_id)
+        skills = rng.sample(SKILLS, 8)
+        sentences = [f"We are hiring to {r}." for r in rng.sample(RESPONSIBILITIES, 4)]
+        sentences += [f"Required: {q}." for q in rng.sample(QUALIFICATIONS, 2)]
+        sentences.append(f"You have hands-on experience with {', '.join(skills)}.")
+        words = " ".join(sentences).split()
+        while len(words) < self.description_words:
+            words += f"You will use {rng.choice(skills)} to {rng.choice(RESPONSIBILITIES)}.".split()
+        return [{"job_id": job_id, "job_position": f"Position {job_id}", "job_description": " ".join(words)}]
+
+    def listing(self, field, page):
+        prefix = re.sub(r"\W+", "-", field.lower())
+        return [{"job_id": f"{prefix}-{page}-{i}", "job_position": f"{field} {i}"} for i in range(self.listing_size)]
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                time.sleep(fake.latency)
+                if url.path == "/linkedin":
+                    fake._count("profile")
+                    body = fake.profile
+                elif url.path == "/linkedinjobs" and "job_id" in params:
+                    fake._count("job_overview")
+                    body = fake.job_overview(params["job_id"])
+                elif url.path == "/linkedinjobs":
+                    fake._count("job_listings")
+                    body = fake.listing(params.get("field", ""), params.get("page", "1"))
+                else:
+                    self.send_error(404)
+                    return
+                data = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+    def start(self):
+        # Starts serving on a free local port and returns the base URL to use as SCRAPINGDOG_BASE_URL.
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="fake-scrapingdog", daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+class FakeLLM(LLM):
+    """
+    Completion LLM that waits latency seconds, then emits output_tokens tokens token_latency seconds apart.
+    """
+
+    model_name: str = "fake-llm"
+    temperature: float = 0.1
+    latency: float = 0.3
+    token_latency: float = 0.005
+    output_tokens: int = 150
+
+    @property
+    def _llm_type(self):
+        return "fake"
+
+    def _tokens(self, prompt):
+        rng = random.Random(len(prompt))
+        return [f"{rng.choice(SKILLS).split()[0].lower()} " for _ in range(self.output_tokens)]
+
+    def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency + self.token_latency * self.output_tokens)
+        return "".join(self._tokens(prompt))
+
+    async def _acall(self, prompt, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency + self.token_latency * self.output_tokens)
+        return "".join(self._tokens(prompt))
+
+    def _stream(self, prompt, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        for token in self._tokens(prompt):
+            time.sleep(self.token_latency)
+            chunk = GenerationChunk(text=token)
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, prompt, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        for token in self._tokens(prompt):
+            await asyncio.sleep(self.token_latency)
+            chunk = GenerationChunk(text=token)
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+class FakeChatLLM(BaseChatModel):
+    """
+    Chat LLM for job requirement extraction. Answers with a JSON summary of the vocabulary items found in the
+    prompt after latency + token_latency * output_tokens seconds.
+    """
+
+    model_name: str = "fake-chat-llm"
+    temperature: float = 0.0
+    latency: float = 0.3
+    token_latency: float = 0.005
+    output_tokens: int = 200
+
+    @property
+    def _llm_type(self):
+        return "fake-chat"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        prompt = "\n".join(str(m.content) for m in messages)
+        time.sleep(self.latency + self.token_latency * self.output_tokens)
+        summary = {
+            "skills": [s for s in SKILLS if s in prompt],
+            "responsibilities": [r.capitalize() for r in RESPONSIBILITIES if r in prompt],
+            "qualifications": [q for q in QUALIFICATIONS if q in prompt],
+            "industry_practices": ["Agile development", "Code review"],
+            "highlights": ["Hybrid work", "Learning budget"],
+        }
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=json.dumps(summary)))])
+
+
+def install_fake_llms(llm, chat_llm):
+    # Replaces the module-level LLMs used by the graph nodes and by job requirement extraction.
+    import utils.llm_chain
+    import utils.scraper
+
+    utils.llm_chain.llm = llm
+    utils.scraper.llm = chat_llm
@@ -0,0 +1,327 @@
+"""
+Offline benchmark suite.
+
+Measures the optimizer end to end without API keys: ScrapingDog is replaced by a local fake server replaying
+profile.json and the LLMs by fakes with configurable latency and output length (see benchmarks/fakes.py).
+All caches and databases live in a temporary directory, caches are cleared before every measurement and the
+LLM completion cache is bypassed, so every number is a cold run.
+
+Reports, as JSON:
+- per-stage timings for fetch_all_data (profile + job summary in parallel, as in app.py), fetch_profile,
+  fetch_top_job_overviews, evaluate_job_descriptions and each graph node;
+- end-to-end session latency and throughput at 1, 10 and 50 concurrent sessions;
+- checkpoint DB growth per session, before and after pruning;
+- prompt token counts per node;
+- hit/miss counters and hit rates of the scrape and LLM caches.
+
+    python -m benchmarks.offline_suite --output bench.json
+    python -m benchmarks.offline_suite --compare bench.json   # exits 1 if a latency regressed by more than 20%
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from benchmarks.fakes import FakeChatLLM, FakeLLM, FakeScrapingDog, install_fake_llms
+from utils.telemetry import percentiles
+
+ROLES = ("AI Developer", "Data Scientist", "Product Manager", "ML Engineer", "Data Engineer")
+EXP_LEVEL = "associate"
+NODES = ("analysis", "fit", "rewrite", "counseling")
+
+
+def db_used_bytes(path):
+    # Bytes of live pages in a SQLite database, after folding its WAL back in (free pages left by deletes don't count).
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        page_count, = conn.execute("PRAGMA page_count").fetchone()
+        freelist, = conn.execute("PRAGMA freelist_count").fetchone()
+        page_size, = conn.execute("PRAGMA page_size").fetchone()
+    finally:
+        conn.close()
+    return (page_count - freelist) * page_size
+
+
+class NodeTimer(BaseCallbackHandler):
+    """
+    Callback handler recording the wall time of every graph node run (across threads and sessions).
+    """
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self._started = {}
+        self._lock = threading.Lock()
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, name=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        if node in NODES and name == node:
+            with self._lock:
+                if parent_run_id in self._started:
+                    return  # the node's inner runnable, already timed by its parent
+                self._started[run_id] = (node, time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        with self._lock:
+            started = self._started.pop(run_id, None)
+            if started:
+                self.samples[started[0]].append(time.perf_counter() - started[1])
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            self._started.pop(run_id, None)
+
+    def report(self):
+        return {node: percentiles(self.samples[node], unit="ms") for node in NODES}
+
+
+class OfflineSuite:
+    """
+    Runs the measurements against the project modules, which must be imported after the environment points
+    every cache and database at the suite's work directory (see main()).
+    """
+
+    def __init__(self, repeat=3, levels=(1, 10, 50)):
+        from utils import scraper
+        from utils.cache import cache_mode, cache_stats
+        from utils.checkpoint_store import CHECKPOINT_DB_PATH, PooledSqliteSaver
+        from utils.job_corpus import job_corpus
+        from utils.job_market import get_job_summary, summary_store
+        from utils.llm_chain import build_graph
+
+        self.scraper = scraper
+        self.cache_mode = cache_mode
+        self.cache_stats = cache_stats
+        self.get_job_summary = get_job_summary
+        self.summary_store = summary_store
+        self.job_corpus = job_corpus
+        self.db_path = CHECKPOINT_DB_PATH
+        self.compiled = build_graph().compile(checkpointer=PooledSqliteSaver(CHECKPOINT_DB_PATH))
+        self.repeat = repeat
+        self.levels = levels
+
+    def reset_caches(self):
+        self.scraper.response_cache.clear()
+        self.summary_store.clear()
+        self.job_corpus.clear()
+
+    def fetch_all_data(self, profile_id, role):
+        # Mirrors app.fetch_all_data: profile and job summary fetched concurrently on the event loop's executor.
+        async def gather():
+            loop = asyncio.get_running_loop()
+            return await asyncio.gather(
+                loop.run_in_executor(None, self.scraper.fetch_profile, profile_id),
+                loop.run_in_executor(None, self.get_job_summary, role, EXP_LEVEL),
+            )
+
+        return asyncio.run(gather())
+
+    def _time(self, func, *args):
+        self.reset_caches()
+        started = time.perf_counter()
+        result = func(*args)
+        return time.perf_counter() - started, result
+
+    def measure_stages(self):
+        """
+        Cold timings of each fetch stage and of every graph node, repeated self.repeat times.
+        Returns (stage report, one graph result for the token report).
+        """
+        samples = defaultdict(list)
+        timer = NodeTimer()
+        result = None
+        with self.cache_mode("bypass"):
+            for i in range(self.repeat):
+                role = ROLES[i % len(ROLES)]
+                for name, func, args in (
+                    ("fetch_profile", self.scraper.fetch_profile, (f"stage-{i}",)),
+                    ("fetch_top_job_overviews", self.scraper.fetch_top_job_overviews, (role, EXP_LEVEL)),
+                    ("evaluate_job_descriptions", self.scraper.evaluate_job_descriptions, (role, EXP_LEVEL)),
+                    ("fetch_all_data", self.fetch_all_data, (f"stage-{i}", role)),
+                ):
+                    elapsed, value = self._time(func, *args)
+                    samples[name].append(elapsed)
+                profile, job_desc = value
+                config = {"configurable": {"thread_id": f"stage-{i}"}, "callbacks": [timer]}
+                started = time.perf_counter()
+                result = self.compiled.invoke({"profile": profile, "job_desc": job_desc}, config=config)
+                samples["graph"].append(time.perf_counter() - started)
+        report = {name: percentiles(values, unit="ms") for name, values in samples.items()}
+        report["nodes"] = timer.report()
+        return report, result
+
+    def measure_concurrency(self, sessions):
+        """
+        Runs sessions simultaneous end-to-end sessions (fetch_all_data, then the graph, then retention pruning),
+        each on its own thread_id, with roles shared round-robin between sessions.
+        """
+        self.reset_caches()
+        timer = NodeTimer()
+        latencies, errors = [], []
+        size_before = db_used_bytes(self.db_path)
+
+        def session(i):
+            started = time.perf_counter()
+            with self.cache_mode("bypass"):
+                profile, job_desc = self.fetch_all_data(f"session-{sessions}-{i}", ROLES[i % len(ROLES)])
+                config = {"configurable": {"thread_id": f"session-{sessions}-{i}"}, "callbacks": [timer]}
+                self.compiled.invoke({"profile": profile, "job_desc": job_desc}, config=config)
+            latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=sessions) as executor:
+            for future in [executor.submit(session, i) for i in range(sessions)]:
+                try:
+                    future.result()
+                except Exception as e:
+                    errors.append(repr(e))
+        wall = time.perf_counter() - started
+        size_after = db_used_bytes(self.db_path)
+        for i in range(sessions):
+            self.compiled.checkpointer.prune(f"session-{sessions}-{i}")
+        self.compiled.checkpointer.compact(vacuum=False)
+        size_pruned = db_used_bytes(self.db_path)
+        return {
+            "sessions": sessions,
+            "wall_s": round(wall, 3),
+            "sessions_per_s": round(sessions / wall, 3) if wall else None,
+            "errors": len(errors),
+            "error_samples": errors[:5],
+            "latency": percentiles(latencies, unit="ms"),
+            "nodes": timer.report(),
+            "checkpoint_db": {
+                "used_bytes_before": size_before,
+                "used_bytes_after": size_after,
+                "bytes_per_session": round((size_after - size_before) / sessions),
+                "bytes_per_session_after_prune": round((size_pruned - size_before) / sessions),
+            },
+        }
+
+    def run(self):
+        from utils.profile_projection import prompt_token_report
+
+        stages, result = self.measure_stages()
+        concurrency = [self.measure_concurrency(n) for n in self.levels]
+        self.compiled.checkpointer.compact()
+        return {
+            "stages": stages,
+            "concurrency": concurrency,
+            "checkpoint_db_file_bytes": os.path.getsize(self.db_path),
+            "prompt_tokens": {**result.get("prompt_tokens", {}), **prompt_token_report(result["profile"])},
+            # Hit/miss counters over the whole run, across the cache resets between measurements.
+            "caches": self.cache_stats(),
+        }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _latencies(report, prefix=""):
+    # Flattens a report to {"a.b.p95_ms": value} for every latency statistic.
+    flat = {}
+    for key, value in report.items():
+        if isinstance(value, dict):
+            flat.update(_latencies(value, f"{prefix}{key}."))
+        elif isinstance(value, list):
+            for item in value:
+                if isinstance(item, dict) and "sessions" in item:
+                    flat.update(_latencies(item, f"{prefix}{key}[{item['sessions']}]."))
+        elif key.endswith("_ms") and key != "max_ms" and isinstance(value, (int, float)):
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def compare(baseline, current, threshold):
+    """
+    Compares the latency statistics of two reports. Returns the rows (metric, baseline, current, change)
+    whose latency grew by more than threshold (a fraction).
+    """
+    before, after = _latencies(baseline), _latencies(current)
+    regressions = []
+    for metric, value in after.items():
+        old = before.get(metric)
+        if old and (value - old) / old > threshold:
+            regressions.append((metric, old, value, round((value - old) / old, 3)))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", default="profile.json", help="profile fixture served by the fake ScrapingDog")
+    parser.add_argument("--levels", default="1,10,50", help="comma-separated concurrent session counts")
+    parser.add_argument("--repeat", type=int, default=3, help="repetitions of the per-stage measurements")
+    parser.add_argument("--scrape-latency", type=float, default=0.2, help="seconds per fake ScrapingDog response")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="seconds before the first fake LLM token")
+    parser.add_argument("--token-latency", type=float, default=0.005, help="seconds per fake LLM output token")
+    parser.add_argument("--output-tokens", type=int, default=150, help="tokens per fake node completion")
+    parser.add_argument("--output", default=None, help="write the JSON report here (default: stdout)")
+    parser.add_argument("--compare", default=None, help="baseline report to compare latencies against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="regression threshold for --compare (fraction)")
+    args = parser.parse_args()
+
+    fake = FakeScrapingDog(args.profile, latency=args.scrape_latency)
+    workdir = tempfile.mkdtemp(prefix="linkedin-bench-")
+    os.environ.update({
+        "SCRAPINGDOG_BASE_URL": fake.start(),
+        "SCRAPPING_API_KEY": "offline",
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "offline"),
+        "SCRAPE_CACHE_PATH": os.path.join(workdir, "scrape_cache.db"),
+        "LLM_CACHE_PATH": os.path.join(workdir, "llm_cache.db"),
+        "JOB_SUMMARY_DB_PATH": os.path.join(workdir, "job_summaries.db"),
+        "JOB_CORPUS_DB_PATH": os.path.join(workdir, "job_corpus.db"),
+        # No background crawling, so it doesn't compete with the measured requests.
+        "JOB_CORPUS_CRAWL_PAGES": "0",
+        "CHECKPOINT_DB_PATH": os.path.join(workdir, "checkpoints.db"),
+        "RESULTS_DB_PATH": os.path.join(workdir, "results.db"),
+    })
+    llm_settings = {"latency": args.llm_latency, "token_latency": args.token_latency}
+    install_fake_llms(FakeLLM(output_tokens=args.output_tokens, **llm_settings), FakeChatLLM(**llm_settings))
+
+    levels = tuple(int(n) for n in args.levels.split(","))
+    started = time.perf_counter()
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "settings": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        },
+        **OfflineSuite(args.repeat, levels).run(),
+    }
+    report["meta"]["duration_s"] = round(time.perf_counter() - started, 2)
+    report["scrapingdog_requests"] = dict(fake.stats)
+    fake.stop()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        for metric, old, new, change in regressions:
+            print(f"REGRESSION {metric}: {old} -> {new} ms (+{change:.0%})", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+"""
+Optimizer API service.
+
+A standalone asyncio (Tornado) HTTP service running the same scraper functions and compiled graph as the
+Streamlit app, so optimizations no longer block a browser session and the service can be scaled on its own.
+
+    POST /analyze                 {"email", "profile_url", "target_role", "exp_level", "regenerate"} -> 202 job
+    GET  /jobs/<job_id>           job status (state, completed sections, result when done)
+    GET  /jobs/<job_id>/stream    Server-Sent Events: state, token, node, done / error (replayed from the start)
+    GET  /results/<email>         latest result (checkpoint first, then the results store) and history
+    GET  /healthz                 queue depth, worker count and cache hit rates
+
+Every route except /healthz requires "Authorization: Bearer <SERVICE_API_TOKEN>" when the token is set. Without
+it anyone who can reach the service can read any email's results, so only run it unset on a trusted network.
+
+Jobs wait in a bounded queue (503 when full) and are run by a fixed pool of workers. Identical requests that
+arrive while a job is queued or running (same profile URL, normalized role, exp_level and cache mode) join that
+job instead of scraping and calling the LLM again; the result is saved for every email that joined.
+
+    python service.py --port 8000 --workers 4 --queue-size 100
+"""
+import argparse
+import asyncio
+import hmac
+import json
+import os
+import secrets
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import tornado.web
+from tornado.iostream import StreamClosedError
+
+from utils.cache import cache_mode, cache_stats
+from utils.checkpoint_store import PooledSqliteSaver
+from utils.job_market import EXP_LEVELS, get_job_summary, normalize_role, start_background_refresher
+from utils.llm_chain import build_graph
+from utils.results_store import RESULT_KEYS, get_results_store, load_previous
+from utils.scraper import fetch_profile
+
+SERVICE_PORT = int(os.getenv("SERVICE_PORT", "8000"))
+SERVICE_WORKERS = int(os.getenv("SERVICE_WORKERS", "4"))
+SERVICE_QUEUE_SIZE = int(os.getenv("SERVICE_QUEUE_SIZE", "100"))
+# Finished jobs stay pollable for this many seconds.
+SERVICE_JOB_TTL = float(os.getenv("SERVICE_JOB_TTL", "3600"))
+# Shared secret clients must send as a bearer token; empty disables authentication.
+SERVICE_API_TOKEN = os.getenv("SERVICE_API_TOKEN", "")
+TERMINAL_STATES = ("done", "failed")
+
+
+class Job:
+    """
+    One optimization run and its event log. Events are appended on the event loop thread; subscribers get the
+    full log replayed and then live events until the job finishes.
+    The id is unguessable, since it is all a client needs to read the job; the status never includes the emails
+    that joined it or the fetched profile and job summary.
+    """
+
+    def __init__(self, key, request):
+        self.id = secrets.token_urlsafe(16)
+        self.key = key
+        self.request = request
+        self.emails = [request["email"]]
+        self.state = "queued"
+        self.created_at = time.time()
+        self.started_at = self.finished_at = None
+        self.inputs = None
+        self.sections = {}
+        self.result = None
+        self.error = None
+        self.events = []
+        self._subscribers = set()
+
+    def publish(self, event):
+        if event["type"] == "state":
+            self.state = event["state"]
+        elif event["type"] == "node" and event["node"] == "plan":
+            # Sections reused from the previous run are done as soon as the run is planned.
+            update = event["update"]
+            self.sections.update({node: {node: update[node]} for node in update["run_plan"]["reused"]})
+        elif event["type"] == "node":
+            self.sections[event["node"]] = event["update"]
+        self.events.append(event)
+        for queue in self._subscribers:
+            queue.put_nowait(event)
+
+    async def subscribe(self):
+        queue = asyncio.Queue()
+        history = list(self.events)
+        self._subscribers.add(queue)
+        try:
+            for event in history:
+                yield event
+            if self.state in TERMINAL_STATES:
+                return
+            while True:
+                event = await queue.get()
+                yield event
+                if event["type"] == "state" and event["state"] in TERMINAL_STATES:
+                    return
+        finally:
+            self._subscribers.discard(queue)
+
+    def status(self, queue_position=None):
+        status = {
+            "job_id": self.id,
+            "state": self.state,
+            "request": {k: v for k, v in self.request.items() if k != "email"},
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "sections_done": list(self.sections),
+        }
+        if queue_position is not None:
+            status["queue_position"] = queue_position
+        if self.result is not None:
+            status["result"] = self.result
+        if self.error is not None:
+            status["error"] = self.error
+        return status
+
+
+class OptimizerService:
+    """
+    Bounded job queue, worker pool and single-flight table in front of the compiled graph.
+    Blocking work (scraping, SQLite, the sync graph) runs in worker threads so the event loop only serves HTTP.
+    """
+
+    def __init__(self, workers=SERVICE_WORKERS, queue_size=SERVICE_QUEUE_SIZE, compiled=None):
+        self.workers = workers
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.compiled = compiled or build_graph().compile(checkpointer=PooledSqliteSaver())
+        self.jobs = {}
+        self.in_flight = {}
+        # One lock per checkpoint thread_id: jobs of the same email with different requests run their graphs one
+        # after the other, so each plans against the previous run's final state rather than a half-written one.
+        self._thread_locks = weakref.WeakValueDictionary()
+        self._tasks = []
+
+    def start(self):
+        # Each job uses up to three threads at once (profile fetch, job summary, graph).
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=self.workers * 3, thread_name_prefix="optimizer")
+        )
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    @staticmethod
+    def request_key(request):
+        mode = "refresh" if request.get("regenerate") else "use"
+        return (request["profile_url"], normalize_role(request["target_role"]), request["exp_level"], mode)
+
+    def submit(self, request):
+        """
+        Queues an optimization, or joins the identical one already queued or running.
+        Returns (job, coalesced); raises asyncio.QueueFull when the queue is at capacity.
+        """
+        self._expire()
+        key = self.request_key(request)
+        job = self.in_flight.get(key)
+        if job is not None:
+            if request["email"] not in job.emails:
+                job.emails.append(request["email"])
+            return job, True
+        job = Job(key, request)
+        self.queue.put_nowait(job)
+        self.jobs[job.id] = job
+        self.in_flight[key] = job
+        return job, False
+
+    def queue_position(self, job):
+        if job.state != "queued":
+            return None
+        return sum(1 for other in self.jobs.values() if other.state == "queued" and other.created_at < job.created_at)
+
+    def _expire(self):
+        cutoff = time.time() - SERVICE_JOB_TTL
+        for job_id in [j.id for j in self.jobs.values() if j.finished_at and j.finished_at < cutoff]:
+            del self.jobs[job_id]
+
+    async def _worker(self):
+        while True:
+            job = await self.queue.get()
+            try:
+                await self._run(job)
+            except Exception as e:
+                job.error = str(e)
+                job.publish({"type": "error", "error": job.error})
+                job.publish({"type": "state", "state": "failed"})
+            finally:
+                job.finished_at = time.time()
+                self.in_flight.pop(job.key, None)
+                self.queue.task_done()
+
+    async def _run(self, job):
+        request = job.request
+        job.started_at = time.time()
+        with cache_mode("refresh" if request.get("regenerate") else "use"):
+            job.publish({"type": "state", "state": "fetching"})
+            profile, job_desc = await asyncio.gather(
+                asyncio.to_thread(fetch_profile, request["profile_url"]),
+                asyncio.to_thread(get_job_summary, request["target_role"], request["exp_level"]),
+            )
+            if not profile:
+                raise RuntimeError("Profile could not be fetched")
+            job.inputs = {"profile": profile, "job_desc": job_desc}
+            thread_id = job.emails[0]
+            lock = self._thread_locks.get(thread_id)
+            if lock is None:
+                lock = self._thread_locks[thread_id] = asyncio.Lock()
+            async with lock:
+                job.publish({"type": "state", "state": "running"})
+                state = await asyncio.to_thread(self._run_graph, job, asyncio.get_running_loop(), thread_id)
+                job.result = {key: state.get(key) for key in (*RESULT_KEYS, "run_plan")}
+                # Stop accepting joiners first, so every email in job.emails gets the result saved.
+                self.in_flight.pop(job.key, None)
+                await asyncio.to_thread(self._persist, job, thread_id)
+        job.publish({"type": "done", "result": job.result})
+        job.publish({"type": "state", "state": "done"})
+
+    def _run_graph(self, job, loop, thread_id):
+        # Runs on a worker thread; token chunks and node updates are handed to the event loop as they arrive.
+        # Returns this run's final state, from the last "values" chunk.
+        config = {"configurable": {"thread_id": thread_id}}
+        state = None
+        for mode, chunk in self.compiled.stream(job.inputs, config=config, stream_mode=["custom", "updates", "values"]):
+            if mode == "values":
+                state = chunk
+            elif mode == "custom":
+                event = {"type": "token", "node": chunk["node"], "token": chunk["token"]}
+                loop.call_soon_threadsafe(job.publish, event)
+            else:
+                for node, update in chunk.items():
+                    loop.call_soon_threadsafe(job.publish, {"type": "node", "node": node, "update": update})
+        return state
+
+    def _persist(self, job, thread_id):
+        # Saves the result for every email that joined the job; only the first one owns the checkpoint thread.
+        store = get_results_store()
+        for email in list(job.emails):
+            store.save(email, job.result)
+        self.compiled.checkpointer.prune(thread_id)
+
+class BaseHandler(tornado.web.RequestHandler):
+    requires_auth = True
+
+    def initialize(self, service, api_token=""):
+        self.service = service
+        self.api_token = api_token
+
+    def prepare(self):
+        if not (self.requires_auth and self.api_token):
+            return
+        scheme, _, token = self.request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), self.api_token.encode()):
+            raise tornado.web.HTTPError(401, reason="Missing or invalid API token")
+
+    def write_json(self, payload, status=200):
+        self.set_status(status)
+        self.set_header("Content-Type", "application/json")
+        self.finish(json.dumps(payload, default=str))
+
+    def write_error(self, status_code, **kwargs):
+        self.write_json({"error": self._reason}, status_code)
+
+    def get_job(self, job_id):
+        job = self.service.jobs.get(job_id)
+        if job is None:
+            raise tornado.web.HTTPError(404, reason=f"Unknown job {job_id}")
+        return job
+
+
+class AnalyzeHandler(BaseHandler):
+    def post(self):
+        try:
+            body = json.loads(self.request.body or b"{}")
+        except ValueError:
+            raise tornado.web.HTTPError(400, reason="Body must be JSON")
+        request = {k: str(body.get(k) or "").strip() for k in ("email", "profile_url", "target_role", "exp_level")}
+        request["exp_level"] = request["exp_level"] or "associate"
+        request["regenerate"] = bool(body.get("regenerate"))
+        missing = [k for k in ("email", "profile_url", "target_role") if not request[k]]
+        if missing:
+            raise tornado.web.HTTPError(400, reason=f"Missing {', '.join(missing)}")
+        if request["exp_level"] not in EXP_LEVELS:
+            raise tornado.web.HTTPError(400, reason=f"exp_level must be one of {', '.join(EXP_LEVELS)}")
+        try:
+            job, coalesced = self.service.submit(request)
+        except asyncio.QueueFull:
+            self.set_header("Retry-After", "30")
+            raise tornado.web.HTTPError(503, reason="Job queue is full, retry later")
+        self.write_json({**job.status(self.service.queue_position(job)), "coalesced": coalesced}, 202)
+
+
+class JobHandler(BaseHandler):
+    def get(self, job_id):
+        job = self.get_job(job_id)
+        self.write_json(job.status(self.service.queue_position(job)))
+
+
+class JobStreamHandler(BaseHandler):
+    async def get(self, job_id):
+        job = self.get_job(job_id)
+        self.set_header("Content-Type", "text/event-stream")
+        self.set_header("Cache-Control", "no-cache")
+        try:
+            async for event in job.subscribe():
+                self.write(f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n")
+                await self.flush()
+        except StreamClosedError:
+            return
+        self.finish()
+
+
+class ResultsHandler(BaseHandler):
+    async def get(self, email):
+        previous = await asyncio.to_thread(load_previous, self.service.compiled, email)
+        if previous is None:
+            raise tornado.web.HTTPError(404, reason=f"No previous results for {email}")
+        self.write_json({"email": email, **previous})
+
+
+class HealthHandler(BaseHandler):
+    requires_auth = False
+
+    async def get(self):
+        caches = await asyncio.to_thread(cache_stats)
+        self.write_json({"status": "ok", "queued": self.service.queue.qsize(), "workers": self.service.workers,
+                         "in_flight": len(self.service.in_flight), "caches": caches})
+
+
+def make_app(service, api_token=SERVICE_API_TOKEN):
+    args = {"service": service, "api_token": api_token}
+    return tornado.web.Application([
+        (r"/analyze", AnalyzeHandler, args),
+        (r"/jobs/([^/]+)", JobHandler, args),
+        (r"/jobs/([^/]+)/stream", JobStreamHandler, args),
+        (r"/results/(.+)", ResultsHandler, args),
+        (r"/healthz", HealthHandler, args),
+    ])
+
+
+async def serve(port=SERVICE_PORT, workers=SERVICE_WORKERS, queue_size=SERVICE_QUEUE_SIZE):
+    start_background_refresher()
+    service = OptimizerService(workers, queue_size)
+    service.start()
+    server = make_app(service).listen(port)
+    print(f"Optimizer service listening on :{port} with {workers} workers")
+    if not SERVICE_API_TOKEN:
+        print("SERVICE_API_TOKEN is not set: every caller can read every email's results; don't expose this port")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        server.stop()
+        await service.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--workers", type=int, default=SERVICE_WORKERS, help="jobs run concurrently")
+    parser.add_argument("--queue-size", type=int, default=SERVICE_QUEUE_SIZE, help="queued jobs before 503")
+    args = parser.parse_args()
+    asyncio.run(serve(args.port, args.workers, args.queue_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import json
+import os
+import time
+
+import requests
+
+# Base URL of the optimizer API service (service.py); when set, the Streamlit app is a thin client of it.
+OPTIMIZER_API_URL = os.getenv("OPTIMIZER_API_URL", "").rstrip("/")
+API_TIMEOUT = float(os.getenv("OPTIMIZER_API_TIMEOUT", "30"))
+# Bearer token matching the service's SERVICE_API_TOKEN.
+OPTIMIZER_API_TOKEN = os.getenv("OPTIMIZER_API_TOKEN", "")
+POLL_INTERVAL = 0.5
+
+_session = requests.Session()
+if OPTIMIZER_API_TOKEN:
+    _session.headers["Authorization"] = f"Bearer {OPTIMIZER_API_TOKEN}"
+
+
+class ServiceError(RuntimeError):
+    pass
+
+
+def _request(method, path, **kwargs):
+    response = _session.request(method, f"{OPTIMIZER_API_URL}{path}", timeout=API_TIMEOUT, **kwargs)
+    if response.status_code >= 400:
+        try:
+            message = response.json().get("error")
+        except ValueError:
+            message = response.text
+        raise ServiceError(f"{response.status_code}: {message}")
+    return response.json()
+
+
+def submit_analysis(email, profile_url, target_role, exp_level, regenerate=False):
+    # Queues an analysis (or joins an identical running one) and returns the job status, with "coalesced".
+    return _request("POST", "/analyze", json={
+        "email": email, "profile_url": profile_url, "target_role": target_role,
+        "exp_level": exp_level, "regenerate": regenerate,
+    })
+
+
+def job_status(job_id):
+    return _request("GET", f"/jobs/{job_id}")
+
+
+def wait_for_job(job_id, states=("done", "failed")):
+    """
+    Polls the job until it reaches one of states and returns its status; raises ServiceError if it failed.
+    """
+    while True:
+        status = job_status(job_id)
+        if status["state"] == "failed":
+            raise ServiceError(status.get("error") or "Job failed")
+        if status["state"] in states:
+            return status
+        time.sleep(POLL_INTERVAL)
+
+
+def stream_job(job_id):
+    """
+    Follows the job's Server-Sent Events and yields (mode, chunk) pairs shaped like compiled.stream(...,
+    stream_mode=["custom", "updates"]): ("custom", {"node", "token"}) and ("updates", {node: update}).
+    Raises ServiceError if the job fails.
+    """
+    with _session.get(f"{OPTIMIZER_API_URL}/jobs/{job_id}/stream", stream=True, timeout=(API_TIMEOUT, None)) as response:
+        response.raise_for_status()
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            event = json.loads(line[len("data:"):])
+            if event["type"] == "token":
+                yield "custom", {"node": event["node"], "token": event["token"]}
+            elif event["type"] == "node":
+                yield "updates", {event["node"]: event["update"]}
+            elif event["type"] == "error":
+                raise ServiceError(event["error"])
+
+
+def load_previous(email):
+    # Returns the latest result, its source and the history for email, or None when there is nothing saved.
+    try:
+        return _request("GET", f"/results/{requests.utils.quote(email)}")
+    except ServiceError as e:
+        if str(e).startswith("404"):
+            return None
+        raise
@@ -0,0 +1,252 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import xxhash
+
+from utils.checkpoint_store import ThreadLocalConnections
+from utils.rate_limit import llm_limiter
+from utils.telemetry import llm_usage, span
+
+# Default time-to-live (seconds) per response type.
+DEFAULT_TTLS = {
+    "profile": 24 * 3600,
+    "job_listings": 6 * 3600,
+    "job_overview": 7 * 24 * 3600,
+}
+
+CACHE_PATH = os.getenv("SCRAPE_CACHE_PATH", "scrape_cache.db")
+MAX_ENTRIES = int(os.getenv("SCRAPE_CACHE_MAX_ENTRIES", "5000"))
+
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.db")
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+
+# "use" reads and writes the completion cache (and the cached profile), "refresh" skips the read but stores the
+# new answer, "bypass" neither reads nor writes.
+CACHE_MODES = ("use", "refresh", "bypass")
+_cache_mode = contextvars.ContextVar("llm_cache_mode", default=os.getenv("LLM_CACHE_MODE", "use"))
+
+
+class _SQLiteCache:
+    """
+    Shared plumbing for the SQLite-backed caches: a per-thread WAL connection, an LRU-evicted entries table,
+    and hit/miss counters grouped by a label.
+    """
+
+    def __init__(self, path, max_entries):
+        self.path = path
+        self.max_entries = max_entries
+        # One connection per thread; WAL lets concurrent sessions read while another writes.
+        self._conn = ThreadLocalConnections(path)
+        self._lock = threading.Lock()
+        self._hits = {}
+        self._misses = {}
+        conn = self._conn()
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+            """
+        )
+        conn.commit()
+
+    def _count(self, counters, label):
+        with self._lock:
+            counters[label] = counters.get(label, 0) + 1
+
+    def _read(self, key, label, ttl):
+        conn = self._conn()
+        row = conn.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row is None or now - row[1] > ttl:
+            if row is not None:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                conn.commit()
+            self._count(self._misses, label)
+            return None
+        conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        conn.commit()
+        self._count(self._hits, label)
+        return json.loads(row[0])
+
+    def _write(self, key, kind, value):
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO responses (key, kind, value, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+            (key, kind, json.dumps(value), now, now),
+        )
+        overflow = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                (overflow,),
+            )
+        conn.commit()
+
+    def clear(self):
+        conn = self._conn()
+        conn.execute("DELETE FROM responses")
+        conn.commit()
+
+    def stats(self):
+        """
+        Returns hit/miss counters per label plus the overall hit rate and current entry count.
+        """
+        with self._lock:
+            hits, misses = dict(self._hits), dict(self._misses)
+        total_hits, total_misses = sum(hits.values()), sum(misses.values())
+        lookups = total_hits + total_misses
+        entries = self._conn().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": total_hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
+
+
+class ResponseCache(_SQLiteCache):
+    """
+    Disk-backed response cache for ScrapingDog scrapes.
+    Entries are keyed on the response type plus the request parameters, expire after a per-type TTL,
+    and the least recently used entries are evicted once the cache grows past max_entries.
+    Keeps hit/miss counters per response type for the lifetime of the process.
+    """
+
+    def __init__(self, path=CACHE_PATH, ttls=None, max_entries=MAX_ENTRIES):
+        super().__init__(path, max_entries)
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+
+    @staticmethod
+    def make_key(kind, params):
+        return f"{kind}:{json.dumps(params, sort_keys=True, default=str)}"
+
+    def get(self, kind, params):
+        """
+        Returns the cached value for (kind, params), or None if it is missing or older than the kind's TTL.
+        """
+        return self._read(self.make_key(kind, params), kind, self.ttls.get(kind, 0))
+
+    def set(self, kind, params, value):
+        """
+        Stores value for (kind, params) and evicts least recently used entries beyond max_entries.
+        """
+        self._write(self.make_key(kind, params), kind, value)
+
+
+class CompletionCache(_SQLiteCache):
+    """
+    Content-addressed cache of LLM completions.
+    Entries are keyed on an xxh3-128 hash of (model, temperature, prompt), so byte-identical prompts sent to the
+    same model settings are answered from disk. Hit/miss counters are grouped by caller label (e.g. node name).
+    """
+
+    def __init__(self, path=LLM_CACHE_PATH, ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES):
+        super().__init__(path, max_entries)
+        self.ttl = ttl
+
+    @staticmethod
+    def make_key(model, temperature, prompt):
+        hasher = xxhash.xxh3_128()
+        hasher.update(f"{model}\x00{temperature}\x00".encode())
+        hasher.update(prompt.encode())
+        return hasher.hexdigest()
+
+    def get(self, model, temperature, prompt, label="llm"):
+        return self._read(self.make_key(model, temperature, prompt), label, self.ttl)
+
+    def set(self, model, temperature, prompt, completion, label="llm"):
+        self._write(self.make_key(model, temperature, prompt), label, completion)
+
+
+# The process-wide caches by name, reported together by cache_stats().
+_registry = {}
+
+
+def register_cache(name, cache):
+    _registry[name] = cache
+    return cache
+
+
+def cache_stats():
+    # Returns stats() (hits and misses per label, hit rate, entries) of every registered cache, by name.
+    return {name: cache.stats() for name, cache in _registry.items()}
+
+
+completion_cache = register_cache("llm", CompletionCache())
+
+
+def get_cache_mode():
+    return _cache_mode.get()
+
+
+@contextmanager
+def cache_mode(mode):
+    """
+    Temporarily switches the completion cache mode ("use", "refresh" or "bypass") for the current context.
+    """
+    if mode not in CACHE_MODES:
+        raise ValueError(f"Unknown cache mode {mode!r}; expected one of {CACHE_MODES}")
+    token = _cache_mode.set(mode)
+    try:
+        yield
+    finally:
+        _cache_mode.reset(token)
+
+
+def _llm_identity(llm):
+    return getattr(llm, "model_name", type(llm).__name__), getattr(llm, "temperature", None)
+
+
+def cached_completion(llm, prompt, compute, label="llm"):
+    """
+    Returns the completion for prompt from the completion cache, calling compute() on a miss.
+    Honours the current cache mode and stores fresh completions unless the cache is bypassed.
+    Only misses count against the global LLM rate limit. Each call is recorded as an "llm.<label>" telemetry span
+    with token counts, estimated cost and whether it was a cache hit.
+    """
+    model, temperature = _llm_identity(llm)
+    mode = get_cache_mode()
+    with span(f"llm.{label}", kind="llm", model=model, cache_mode=mode) as s:
+        if mode == "use":
+            cached = completion_cache.get(model, temperature, prompt, label)
+            if cached is not None:
+                s.set(**llm_usage(model, prompt, cached, cache_hit=True))
+                return cached
+        s.set(rate_limit_wait_s=llm_limiter.acquire())
+        completion = compute()
+        s.set(**llm_usage(model, prompt, completion))
+    if mode != "bypass":
+        completion_cache.set(model, temperature, prompt, completion, label)
+    return completion
+
+
+async def acached_completion(llm, prompt, acompute, label="llm"):
+    """
+    Async variant of cached_completion; acompute is a coroutine function.
+    """
+    model, temperature = _llm_identity(llm)
+    mode = get_cache_mode()
+    with span(f"llm.{label}", kind="llm", model=model, cache_mode=mode) as s:
+        if mode == "use":
+            cached = completion_cache.get(model, temperature, prompt, label)
+            if cached is not None:
+                s.set(**llm_usage(model, prompt, cached, cache_hit=True))
+                return cached
+        s.set(rate_limit_wait_s=await llm_limiter.aacquire())
+        completion = await acompute()
+        s.set(**llm_usage(model, prompt, completion))
+    if mode != "bypass":
+        completion_cache.set(model, temperature, prompt, completion, label)
+    return completion
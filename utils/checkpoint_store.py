@@ -0,0 +1,412 @@
+import argparse
+import os
+import sqlite3
+import threading
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+
+import aiosqlite
+import xxhash
+from langgraph.checkpoint.base import CheckpointTuple
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+CHECKPOINT_DB_PATH = os.getenv("CHECKPOINT_DB_PATH", "linkedin_memory.db")
+BUSY_TIMEOUT_MS = int(os.getenv("CHECKPOINT_BUSY_TIMEOUT_MS", "30000"))
+# Channel values and writes at least this large are stored once in checkpoint_blobs and referenced by hash.
+BLOB_MIN_BYTES = int(os.getenv("CHECKPOINT_BLOB_MIN_BYTES", "1024"))
+# Number of most recent runs per thread_id kept in full by prune(); older runs keep only their final checkpoint.
+RETAIN_RUNS = int(os.getenv("CHECKPOINT_RETAIN_RUNS", "3"))
+BLOB_MARKER = "__checkpoint_blob__"
+
+# WAL lets readers proceed while one writer commits; NORMAL sync is durable across app crashes in WAL mode
+# and avoids an fsync per checkpoint commit.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}",
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+def connect(path=CHECKPOINT_DB_PATH):
+    """
+    Opens a SQLite connection to the checkpoint DB with WAL mode and a busy timeout, so concurrent writers
+    wait for the lock instead of failing with "database is locked".
+    """
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+class _ThreadConnection:
+    # Owns one thread's connection. Only the thread's local storage holds it strongly, so the connection is
+    # closed as soon as the thread ends, instead of accumulating over the executor threads of every run.
+    __slots__ = ("conn", "__weakref__")
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __del__(self):
+        self.conn.close()
+
+
+class ThreadLocalConnections:
+    """
+    Per-thread connections to one database, for stores used from many threads: calling it returns the current
+    thread's connection, opened with connect() (then passed to on_connect, if given) on first use and closed when
+    the thread ends. close() closes every connection still open.
+    """
+
+    def __init__(self, path, on_connect=None):
+        self.path = path
+        self.on_connect = on_connect
+        self._local = threading.local()
+        # Weak, so finished threads' connections can be closed; close() uses it to reach the live ones.
+        self._owners = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        owner = getattr(self._local, "owner", None)
+        if owner is None:
+            conn = connect(self.path)
+            if self.on_connect is not None:
+                self.on_connect(conn)
+            return self.set(conn)
+        return owner.conn
+
+    def set(self, conn):
+        # Makes conn the current thread's connection and returns it.
+        owner = _ThreadConnection(conn)
+        self._local.owner = owner
+        with self._lock:
+            self._owners.add(owner)
+        return conn
+
+    def close(self):
+        with self._lock:
+            owners, self._owners = list(self._owners), weakref.WeakSet()
+        for owner in owners:
+            owner.conn.close()
+        self._local = threading.local()
+
+
+def _blob_ref(value):
+    # Returns the hash a blob reference points to, or None for inline values.
+    if isinstance(value, dict) and len(value) == 1 and BLOB_MARKER in value:
+        return value[BLOB_MARKER]
+    return None
+
+
+class _BlobRefs:
+    """
+    Blob externalization shared by the sync and async savers, which do the actual reads and writes:
+    channel values and writes of at least BLOB_MIN_BYTES are stored once in checkpoint_blobs and referenced by hash.
+    """
+
+    BLOB_SCHEMA = """
+        CREATE TABLE IF NOT EXISTS checkpoint_blobs (
+            hash TEXT PRIMARY KEY,
+            type TEXT,
+            value BLOB
+        );
+        CREATE TABLE IF NOT EXISTS checkpoint_blob_refs (
+            thread_id TEXT NOT NULL,
+            checkpoint_ns TEXT NOT NULL DEFAULT '',
+            checkpoint_id TEXT NOT NULL,
+            hash TEXT NOT NULL,
+            PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, hash)
+        );
+        CREATE INDEX IF NOT EXISTS checkpoint_blob_refs_hash ON checkpoint_blob_refs (hash);
+    """
+    INSERT_BLOB = "INSERT OR IGNORE INTO checkpoint_blobs (hash, type, value) VALUES (?, ?, ?)"
+    INSERT_BLOB_REF = "INSERT OR IGNORE INTO checkpoint_blob_refs (thread_id, checkpoint_ns, checkpoint_id, hash) VALUES (?, ?, ?, ?)"
+
+    def _split_blob(self, config, checkpoint_id, value):
+        """
+        Returns (stored value, rows): a hash reference plus the checkpoint_blobs and checkpoint_blob_refs rows to
+        insert for large values, or the value itself and None if it is small.
+        """
+        type_, data = self.serde.dumps_typed(value)
+        if len(data) < BLOB_MIN_BYTES:
+            return value, None
+        digest = xxhash.xxh3_128_hexdigest(type_.encode() + b"\x00" + data)
+        ref = (str(config["configurable"]["thread_id"]), config["configurable"].get("checkpoint_ns", ""), checkpoint_id, digest)
+        return {BLOB_MARKER: digest}, ((digest, type_, data), ref)
+
+    @staticmethod
+    def _blob_query(digests):
+        return f"SELECT hash, type, value FROM checkpoint_blobs WHERE hash IN ({', '.join('?' * len(digests))})"
+
+    @staticmethod
+    def _blob_digests(checkpoint_tuple):
+        values = [*checkpoint_tuple.checkpoint["channel_values"].values(), *(v for _, _, v in checkpoint_tuple.pending_writes or [])]
+        return sorted({digest for digest in map(_blob_ref, values) if digest})
+
+    def _hydrate(self, checkpoint_tuple, blobs):
+        # Replaces blob references in a loaded checkpoint and its pending writes with the values in blobs ({hash: (type, data)}).
+        def load(value):
+            digest = _blob_ref(value)
+            if digest is None:
+                return value
+            if digest not in blobs:
+                raise KeyError(f"Checkpoint blob {digest} is missing")
+            return self.serde.loads_typed(blobs[digest])
+
+        checkpoint = checkpoint_tuple.checkpoint
+        checkpoint = {**checkpoint, "channel_values": {k: load(v) for k, v in checkpoint["channel_values"].items()}}
+        pending_writes = [(task_id, channel, load(v)) for task_id, channel, v in checkpoint_tuple.pending_writes or []]
+        return CheckpointTuple(checkpoint_tuple.config, checkpoint, checkpoint_tuple.metadata, checkpoint_tuple.parent_config, pending_writes)
+
+
+class PooledSqliteSaver(_BlobRefs, SqliteSaver):
+    """
+    SqliteSaver that gives every thread its own WAL-mode connection instead of serializing all sessions on one
+    shared connection behind a process-wide lock.
+    Reads from different threads run in parallel; writes are serialized by SQLite itself and wait up to the
+    busy timeout. Each put/put_writes call commits as a single batched transaction.
+
+    Large channel values (the profile, the job summary, node outputs) are stored once in checkpoint_blobs keyed by
+    content hash, and checkpoints only carry a reference, so the near-identical checkpoints of a run no longer
+    re-serialize the same inputs. Checkpoints written before this format still load unchanged.
+    """
+
+    def __init__(self, path=CHECKPOINT_DB_PATH, *, serde=None):
+        self.path = path
+        self._connections = ThreadLocalConnections(path)
+        super().__init__(connect(path), serde=serde)
+
+    @property
+    def conn(self):
+        return self._connections()
+
+    @conn.setter
+    def conn(self, conn):
+        self._connections.set(conn)
+
+    def setup(self):
+        if self.is_setup:
+            return
+        with self.lock:
+            if self.is_setup:
+                return
+            self.conn.executescript(self.BLOB_SCHEMA)
+            super().setup()
+
+    @contextmanager
+    def cursor(self, transaction=True):
+        self.setup()
+        conn = self.conn
+        cur = conn.cursor()
+        try:
+            yield cur
+        finally:
+            if transaction:
+                conn.commit()
+            cur.close()
+
+    def _store_blob(self, cur, config, checkpoint_id, value):
+        # Returns a hash reference for large values (storing the blob once), or the value itself if it is small.
+        value, rows = self._split_blob(config, checkpoint_id, value)
+        if rows:
+            cur.execute(self.INSERT_BLOB, rows[0])
+            cur.execute(self.INSERT_BLOB_REF, rows[1])
+        return value
+
+    def _load(self, checkpoint_tuple):
+        if checkpoint_tuple is None:
+            return None
+        digests = self._blob_digests(checkpoint_tuple)
+        rows = self.conn.execute(self._blob_query(digests), digests).fetchall() if digests else []
+        return self._hydrate(checkpoint_tuple, {digest: (type_, data) for digest, type_, data in rows})
+
+    def get_tuple(self, config):
+        return self._load(super().get_tuple(config))
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        for checkpoint_tuple in super().list(config, filter=filter, before=before, limit=limit):
+            yield self._load(checkpoint_tuple)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        # Blobs, references and the checkpoint row are committed together by the inner cursor.
+        with self.cursor() as cur:
+            slim = {
+                **checkpoint,
+                "channel_values": {
+                    k: self._store_blob(cur, config, checkpoint["id"], v) for k, v in checkpoint["channel_values"].items()
+                },
+            }
+            return super().put(config, slim, metadata, new_versions)
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        with self.cursor() as cur:
+            checkpoint_id = config["configurable"]["checkpoint_id"]
+            slim = [(channel, self._store_blob(cur, config, checkpoint_id, value)) for channel, value in writes]
+            super().put_writes(config, slim, task_id, task_path)
+
+    def delete_thread(self, thread_id):
+        with self.cursor() as cur:
+            cur.execute("DELETE FROM checkpoint_blob_refs WHERE thread_id = ?", (str(thread_id),))
+            super().delete_thread(thread_id)
+
+    def prune(self, thread_id=None, keep_runs=RETAIN_RUNS):
+        """
+        Applies the retention policy to one thread_id (or all of them): checkpoints of the keep_runs most recent
+        runs are kept in full, older runs keep only their final checkpoint. A run starts at each "input" checkpoint.
+        Returns the number of checkpoints deleted.
+        """
+        with self.cursor(transaction=False) as cur:
+            if thread_id is None:
+                thread_ids = [row[0] for row in cur.execute("SELECT DISTINCT thread_id FROM checkpoints").fetchall()]
+            else:
+                thread_ids = [str(thread_id)]
+        deleted = 0
+        for tid in thread_ids:
+            with self.cursor() as cur:
+                rows = cur.execute(
+                    "SELECT checkpoint_ns, checkpoint_id, metadata FROM checkpoints WHERE thread_id = ? ORDER BY checkpoint_ns, checkpoint_id",
+                    (tid,),
+                ).fetchall()
+                runs = {}
+                for ns, checkpoint_id, metadata in rows:
+                    ns_runs = runs.setdefault(ns, [])
+                    source = self.jsonplus_serde.loads(metadata).get("source") if metadata else None
+                    if not ns_runs or source == "input":
+                        ns_runs.append([])
+                    ns_runs[-1].append(checkpoint_id)
+                doomed = []
+                for ns, ns_runs in runs.items():
+                    for run in (ns_runs[:-keep_runs] if keep_runs > 0 else ns_runs):
+                        doomed.extend((tid, ns, checkpoint_id) for checkpoint_id in run[:-1])
+                for table in ("checkpoints", "writes", "checkpoint_blob_refs"):
+                    cur.executemany(
+                        f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?", doomed
+                    )
+                deleted += len(doomed)
+        return deleted
+
+    def compact(self, vacuum=True):
+        """
+        Removes writes and blob references left behind by deleted checkpoints, drops unreferenced blobs and,
+        if vacuum is set, rebuilds the database file and truncates the WAL to reclaim disk space.
+        Returns the number of blobs removed.
+        """
+        with self.cursor() as cur:
+            for table in ("writes", "checkpoint_blob_refs"):
+                cur.execute(
+                    f"""
+                    DELETE FROM {table} WHERE NOT EXISTS (
+                        SELECT 1 FROM checkpoints c
+                        WHERE c.thread_id = {table}.thread_id AND c.checkpoint_ns = {table}.checkpoint_ns
+                          AND c.checkpoint_id = {table}.checkpoint_id
+                    )
+                    """
+                )
+            cur.execute("DELETE FROM checkpoint_blobs WHERE hash NOT IN (SELECT hash FROM checkpoint_blob_refs)")
+            removed = cur.rowcount
+        if vacuum:
+            conn = self.conn
+            conn.execute("VACUUM")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return removed
+
+    def close(self):
+        # Closes every per-thread connection opened by this saver.
+        self._connections.close()
+
+
+class AsyncBlobSqliteSaver(_BlobRefs, AsyncSqliteSaver):
+    """
+    AsyncSqliteSaver that stores and resolves blob references like PooledSqliteSaver, so async graphs can share
+    the checkpoint DB (and its threads) with the sync ones.
+    """
+
+    async def setup(self):
+        if self.is_setup:
+            return
+        async with self.lock:
+            await self.conn.executescript(self.BLOB_SCHEMA)
+        await super().setup()
+
+    async def _store_blobs(self, config, checkpoint_id, values):
+        # Inserts the blobs of large values without committing; the checkpoint or writes insert commits them.
+        split = [self._split_blob(config, checkpoint_id, value) for value in values]
+        rows = [rows for _, rows in split if rows]
+        if rows:
+            async with self.lock:
+                await self.conn.executemany(self.INSERT_BLOB, [blob for blob, _ in rows])
+                await self.conn.executemany(self.INSERT_BLOB_REF, [ref for _, ref in rows])
+        return [value for value, _ in split]
+
+    async def _aload(self, checkpoint_tuple):
+        if checkpoint_tuple is None:
+            return None
+        digests = self._blob_digests(checkpoint_tuple)
+        rows = []
+        if digests:
+            async with self.lock, self.conn.execute(self._blob_query(digests), digests) as cur:
+                rows = await cur.fetchall()
+        return self._hydrate(checkpoint_tuple, {digest: (type_, data) for digest, type_, data in rows})
+
+    async def aget_tuple(self, config):
+        return await self._aload(await super().aget_tuple(config))
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        # Collected first: the parent holds the lock while it iterates, and loading blobs needs it too.
+        checkpoint_tuples = [t async for t in super().alist(config, filter=filter, before=before, limit=limit)]
+        for checkpoint_tuple in checkpoint_tuples:
+            yield await self._aload(checkpoint_tuple)
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        await self.setup()
+        channels = list(checkpoint["channel_values"])
+        values = await self._store_blobs(config, checkpoint["id"], [checkpoint["channel_values"][k] for k in channels])
+        slim = {**checkpoint, "channel_values": dict(zip(channels, values))}
+        return await super().aput(config, slim, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        await self.setup()
+        values = await self._store_blobs(config, config["configurable"]["checkpoint_id"], [value for _, value in writes])
+        await super().aput_writes(config, [(channel, value) for (channel, _), value in zip(writes, values)], task_id, task_path)
+
+    async def adelete_thread(self, thread_id):
+        async with self.lock:
+            await self.conn.execute("DELETE FROM checkpoint_blob_refs WHERE thread_id = ?", (str(thread_id),))
+        await super().adelete_thread(thread_id)
+
+
+@asynccontextmanager
+async def async_checkpointer(path=CHECKPOINT_DB_PATH):
+    """
+    Yields an AsyncBlobSqliteSaver over an aiosqlite connection with the same WAL/busy-timeout settings,
+    for graphs driven with ainvoke/astream.
+    """
+    async with aiosqlite.connect(path, timeout=BUSY_TIMEOUT_MS / 1000) as conn:
+        for pragma in PRAGMAS:
+            await conn.execute(pragma)
+        saver = AsyncBlobSqliteSaver(conn)
+        await saver.setup()
+        yield saver
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkpoint DB maintenance: retention and compaction.")
+    parser.add_argument("command", choices=("prune", "compact", "maintain"), help="maintain = prune then compact")
+    parser.add_argument("--db", default=CHECKPOINT_DB_PATH)
+    parser.add_argument("--thread-id", default=None, help="only prune this thread_id (default: all)")
+    parser.add_argument("--keep-runs", type=int, default=RETAIN_RUNS)
+    parser.add_argument("--no-vacuum", action="store_true")
+    args = parser.parse_args()
+    saver = PooledSqliteSaver(args.db)
+    size_before = os.path.getsize(args.db)
+    if args.command in ("prune", "maintain"):
+        print(f"Pruned {saver.prune(args.thread_id, args.keep_runs)} checkpoints")
+    if args.command in ("compact", "maintain"):
+        print(f"Removed {saver.compact(vacuum=not args.no_vacuum)} unreferenced blobs")
+    saver.close()
+    print(f"{args.db}: {size_before} -> {os.path.getsize(args.db)} bytes")
+
+
+if __name__ == "__main__":
+    main()
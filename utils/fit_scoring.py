@@ -0,0 +1,147 @@
+import re
+from typing import Dict, List, TypedDict
+
+import numpy as np
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS, CountVectorizer
+
+from utils.profile_projection import JOB_FIELDS, profile_sections
+
+# Weight of skill coverage vs. overall text similarity in the final score.
+SKILL_WEIGHT = 0.6
+SIMILARITY_WEIGHT = 0.4
+# TF-IDF cosine between a whole profile and a job summary rarely exceeds this, so it is treated as a full match.
+SIMILARITY_CEILING = 0.5
+
+PROFILE_SECTIONS = ("headline", "about", "experience", "skills", "education", "certifications", "projects")
+
+
+class FitScore(TypedDict):
+    score: int
+    skill_coverage: float
+    text_similarity: float
+    matched_skills: List[str]
+    missing_skills: List[str]
+    section_coverage: Dict[str, float]
+
+
+def _join(values):
+    return "\n".join(str(v) for v in values if v)
+
+
+def job_text(job_desc):
+    # Concatenates every JobDesc field into one document.
+    job_desc = job_desc or {}
+    parts = []
+    for field in JOB_FIELDS:
+        value = job_desc.get(field)
+        parts.append(_join(value) if isinstance(value, list) else str(value or ""))
+    return "\n".join(parts)
+
+
+def _stem(token):
+    # Light normalisation so "APIs"/"API" and "services"/"service" match.
+    return token[:-1] if len(token) > 3 and token.endswith("s") and not token.endswith("ss") else token
+
+
+def _tokens(text):
+    return [_stem(t) for t in re.findall(r"[a-z0-9+#.]*[a-z0-9+#]", text.lower())]
+
+
+# Stop words run through the same tokenizer, so stemmed forms ("thi", "alway") are dropped too.
+STOP_WORDS = sorted({t for word in ENGLISH_STOP_WORDS for t in _tokens(word)})
+# Smoothed IDF, as TfidfVectorizer computes it, of a term in one of the two documents of a (profile, job) pair;
+# terms in both get 1.
+PAIR_IDF = np.log(3 / 2) + 1
+
+
+def _pairwise_similarities(profile_doc, job_docs):
+    """
+    TF-IDF cosine of the profile against each job, with IDF computed over that (profile, job) pair alone, so a job's
+    similarity doesn't depend on which other jobs are scored with it. Equivalent to fitting a TfidfVectorizer
+    (sublinear tf) on every pair, but computed from one term count matrix for the whole batch.
+    """
+    counter = CountVectorizer(tokenizer=_tokens, token_pattern=None, ngram_range=(1, 2), stop_words=STOP_WORDS)
+    try:
+        counts = counter.fit_transform([profile_doc] + job_docs).astype(float)
+    except ValueError:
+        # Empty vocabulary (no usable text on either side).
+        return np.zeros(len(job_docs))
+    tf = counts.copy()
+    tf.data = 1 + np.log(tf.data)
+    profile_tf = tf[0].toarray().ravel()
+    jobs_tf = tf[1:]
+    jobs_present = (jobs_tf > 0).astype(float)
+    # Shared terms have IDF 1 on both sides, so the dot product is the plain tf product; each side's norm weighs
+    # its terms missing from the other side by PAIR_IDF.
+    dots = jobs_tf @ profile_tf
+    profile_sq = profile_tf ** 2
+    profile_norms = PAIR_IDF ** 2 * profile_sq.sum() - (PAIR_IDF ** 2 - 1) * (jobs_present @ profile_sq)
+    job_weights = np.where(profile_tf > 0, 1.0, PAIR_IDF ** 2)
+    job_norms = jobs_tf.multiply(jobs_tf) @ job_weights
+    norms = np.sqrt(profile_norms * job_norms)
+    return np.divide(dots, norms, out=np.zeros(len(job_docs)), where=norms > 0)
+
+
+def score_profile_against_jobs(profile, job_descs) -> List[FitScore]:
+    """
+    Scores one profile against many JobDesc summaries in batched matrix operations.
+    - text_similarity: TF-IDF cosine between the whole profile and each job summary, with IDF from that pair alone,
+      scaled by SIMILARITY_CEILING.
+    - skill coverage: a job skill counts as matched when every one of its tokens appears in a profile section;
+      the skill x section match matrix for all jobs comes from one sparse product.
+    The score (0-100) blends skill coverage and text similarity; it is deterministic for the same profile and job,
+    whichever other jobs are scored in the same batch.
+    """
+    projected = profile_sections(profile)
+    sections = {name: projected.get(name, "") for name in PROFILE_SECTIONS}
+    section_names = list(sections)
+    profile_doc = "\n".join(sections.values())
+    job_docs = [job_text(j) for j in job_descs]
+    if not job_docs:
+        return []
+
+    # 1. Whole-document similarity, profile vs. every job at once.
+    similarities = np.clip(_pairwise_similarities(profile_doc, job_docs) / SIMILARITY_CEILING, 0.0, 1.0)
+
+    # 2. Skill presence per section for the union of all jobs' skills.
+    job_skills = [[s for s in (j or {}).get("skills") or [] if isinstance(s, str) and s.strip()] for j in job_descs]
+    all_skills = sorted({s.strip() for skills in job_skills for s in skills})
+    matched_by_section = np.zeros((len(all_skills), len(section_names)), dtype=bool)
+    if all_skills:
+        counter = CountVectorizer(tokenizer=_tokens, token_pattern=None, binary=True, lowercase=False)
+        counter.fit(all_skills)
+        skill_matrix = counter.transform(all_skills)
+        section_matrix = counter.transform([sections[name] for name in section_names])
+        overlap = (skill_matrix @ section_matrix.T).toarray()
+        required = np.asarray(skill_matrix.sum(axis=1)).reshape(-1, 1)
+        matched_by_section = (overlap >= required) & (required > 0)
+    skill_index = {s: i for i, s in enumerate(all_skills)}
+
+    results = []
+    for j, skills in enumerate(job_skills):
+        idx = list(dict.fromkeys(skill_index[s.strip()] for s in skills))
+        rows = matched_by_section[idx] if idx else np.zeros((0, len(section_names)), dtype=bool)
+        matched = rows.any(axis=1)
+        coverage = float(matched.mean()) if idx else None
+        similarity = float(similarities[j])
+        if coverage is None:
+            blended = similarity
+        else:
+            blended = SKILL_WEIGHT * coverage + SIMILARITY_WEIGHT * similarity
+        results.append(FitScore(
+            score=int(round(100 * blended)),
+            skill_coverage=round(coverage, 3) if coverage is not None else 0.0,
+            text_similarity=round(similarity, 3),
+            matched_skills=[all_skills[i] for i, m in zip(idx, matched) if m],
+            missing_skills=[all_skills[i] for i, m in zip(idx, matched) if not m],
+            section_coverage={
+                name: round(float(rows[:, k].mean()), 3) if idx else 0.0
+                for k, name in enumerate(section_names)
+            },
+        ))
+    return results
+
+
+def score_profile(profile, job_desc) -> FitScore:
+    # Convenience wrapper for scoring a single job summary.
+    return score_profile_against_jobs(profile, [job_desc])[0]
@@ -0,0 +1,72 @@
+import json
+
+import xxhash
+
+from utils.profile_projection import JOB_FIELDS, profile_sections
+
+# What each graph node reads: "profile" and "job_desc" stand for every section of those inputs, the other names
+# for the outputs of earlier nodes. Listed in execution order, so a node's dependencies come before it.
+NODE_DEPENDENCIES = {
+    "analysis": ("profile",),
+    "fit": ("profile", "job_desc"),
+    "rewrite": ("profile", "job_desc"),
+    "counseling": ("profile", "job_desc", "analysis", "fit", "rewrite"),
+}
+INPUTS = ("profile", "job_desc")
+
+
+def _digest(text):
+    return xxhash.xxh3_64_hexdigest(text.encode())
+
+
+def section_fingerprints(profile, job_desc):
+    """
+    Fingerprints every projected profile section and every job summary field, keyed "profile.<section>" and
+    "job_desc.<field>". Only the projection the prompts see is hashed, so edits to dropped fields don't count.
+    """
+    fingerprints = {f"profile.{name}": _digest(text.strip()) for name, text in profile_sections(profile).items()}
+    job_desc = job_desc or {}
+    for field in JOB_FIELDS:
+        fingerprints[f"job_desc.{field}"] = _digest(json.dumps(job_desc.get(field), sort_keys=True, default=str))
+    return fingerprints
+
+
+def node_fingerprint(node, state, salt="", sections=None):
+    # Fingerprints everything node reads from state; salt covers what else shapes its output, e.g. the prompt template.
+    sections = sections or section_fingerprints(state.get("profile"), state.get("job_desc"))
+    hasher = xxhash.xxh3_64(salt.encode())
+    for dep in NODE_DEPENDENCIES[node]:
+        if dep in INPUTS:
+            for key in sorted(k for k in sections if k.startswith(f"{dep}.")):
+                hasher.update(f"{key}={sections[key]};".encode())
+        else:
+            hasher.update(f"{dep}={_digest(str(state.get(dep) or ''))};".encode())
+    return hasher.hexdigest()
+
+
+def plan_nodes(state, fingerprint, force=False):
+    """
+    Decides which nodes must run for the inputs now in state, against the fingerprints the nodes recorded in
+    state["node_inputs"] when they produced their stored outputs. A node is recomputed when it has no output,
+    its fingerprint changed or a node it depends on is recomputed; every other node keeps its output.
+    fingerprint(node, state, sections) computes a node's current fingerprint; force recomputes everything.
+    Returns {"sections", "recomputed", "reused", "changed_sections"}, the last one relative to state["input_sections"].
+    """
+    sections = section_fingerprints(state.get("profile"), state.get("job_desc"))
+    stored = state.get("node_inputs") or {}
+    recomputed = []
+    for node, deps in NODE_DEPENDENCIES.items():
+        if (
+            force
+            or not state.get(node)
+            or any(dep in recomputed for dep in deps)
+            or stored.get(node) != fingerprint(node, state, sections)
+        ):
+            recomputed.append(node)
+    previous = state.get("input_sections") or {}
+    return {
+        "sections": sections,
+        "recomputed": recomputed,
+        "reused": [node for node in NODE_DEPENDENCIES if node not in recomputed],
+        "changed_sections": sorted(k for k in sections.keys() | previous.keys() if sections.get(k) != previous.get(k)),
+    }
@@ -0,0 +1,287 @@
+import os
+import re
+import sqlite3
+import time
+
+import numpy as np
+import xxhash
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from utils.checkpoint_store import ThreadLocalConnections
+
+try:
+    import sqlite_vec
+except ImportError:
+    sqlite_vec = None
+
+JOB_CORPUS_DB_PATH = os.getenv("JOB_CORPUS_DB_PATH", "job_corpus.db")
+# Vector search needs sqlite-vec and a Python sqlite3 module that can load extensions; "0" turns it off.
+VECTOR_SEARCH = os.getenv("JOB_CORPUS_VECTOR_SEARCH", "1") != "0"
+# Dimensions of the hashed bag-of-words vectors; changing it requires a new corpus DB.
+VECTOR_DIM = int(os.getenv("JOB_CORPUS_VECTOR_DIM", "512"))
+# Reciprocal rank fusion constant: higher values flatten the advantage of the top few results of each ranking.
+RRF_K = 60
+
+_vectorizer = HashingVectorizer(n_features=VECTOR_DIM, ngram_range=(1, 2), alternate_sign=False, norm="l2", stop_words="english")
+
+
+def normalize_role(role):
+    # Normalizes a free-text role so "AI Developer", " ai  developer" and "AI-Developer" share one summary.
+    return re.sub(r"[\W_]+", " ", role.lower()).strip()
+
+
+def embed(texts):
+    # Hashed TF vectors (float32, L2-normalized), so nearest neighbours by L2 distance are nearest by cosine.
+    return _vectorizer.transform(texts).toarray().astype(np.float32)
+
+
+class JobCorpus:
+    """
+    SQLite corpus of scraped job postings, deduplicated by job_id, with an FTS5 index over title and description
+    and, when sqlite-vec can be loaded, a vec0 table of posting vectors for nearest-neighbour search.
+    Each posting also records the (role, exp_level, geoid) listings it was seen in, so searches can be restricted
+    to an experience level and geo, and the crawler can resume pagination per listing query.
+    """
+
+    def __init__(self, path=JOB_CORPUS_DB_PATH, vector_search=VECTOR_SEARCH):
+        self.path = path
+        self.vector_search = vector_search and sqlite_vec is not None
+        self._conn = ThreadLocalConnections(path, on_connect=self._load_vec)
+        conn = self._conn()
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS job_postings (
+                id INTEGER PRIMARY KEY,
+                job_id TEXT NOT NULL UNIQUE,
+                position TEXT NOT NULL DEFAULT '',
+                company TEXT NOT NULL DEFAULT '',
+                location TEXT NOT NULL DEFAULT '',
+                description TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                first_seen_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS job_sightings (
+                job_id TEXT NOT NULL,
+                role TEXT NOT NULL,
+                exp_level TEXT NOT NULL,
+                geoid TEXT NOT NULL,
+                seen_at REAL NOT NULL,
+                PRIMARY KEY (job_id, role, exp_level, geoid)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS job_sightings_query ON job_sightings (role, exp_level, geoid, seen_at);
+            CREATE TABLE IF NOT EXISTS crawl_progress (
+                key TEXT PRIMARY KEY,
+                next_page INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS job_postings_fts USING fts5(
+                position, description, content='job_postings', content_rowid='id', tokenize='porter unicode61'
+            );
+            CREATE TRIGGER IF NOT EXISTS job_postings_ai AFTER INSERT ON job_postings BEGIN
+                INSERT INTO job_postings_fts (rowid, position, description) VALUES (new.id, new.position, new.description);
+            END;
+            CREATE TRIGGER IF NOT EXISTS job_postings_ad AFTER DELETE ON job_postings BEGIN
+                INSERT INTO job_postings_fts (job_postings_fts, rowid, position, description)
+                VALUES ('delete', old.id, old.position, old.description);
+            END;
+            CREATE TRIGGER IF NOT EXISTS job_postings_au AFTER UPDATE OF position, description ON job_postings BEGIN
+                INSERT INTO job_postings_fts (job_postings_fts, rowid, position, description)
+                VALUES ('delete', old.id, old.position, old.description);
+                INSERT INTO job_postings_fts (rowid, position, description) VALUES (new.id, new.position, new.description);
+            END;
+            """
+        )
+        if self.vector_search:
+            conn.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS job_vectors USING vec0(embedding float[{VECTOR_DIM}])")
+        conn.commit()
+
+    def _load_vec(self, conn):
+        if not self.vector_search:
+            return
+        try:
+            conn.enable_load_extension(True)
+            sqlite_vec.load(conn)
+            conn.enable_load_extension(False)
+        except (AttributeError, sqlite3.Error) as e:
+            print(f"sqlite-vec could not be loaded, job corpus vector search disabled: {e}")
+            self.vector_search = False
+
+    def add(self, overviews, role, exp_level, geoid):
+        """
+        Stores job overviews (dicts with job_id, job_position, job_description and optionally company_name and
+        job_location) seen in the listings for role/exp_level/geoid. Postings already stored are updated only if
+        their content changed. Returns the number of postings that were new to the corpus.
+        """
+        now = time.time()
+        new = 0
+        conn = self._conn()
+        with conn:
+            for overview in overviews:
+                description = (overview.get("job_description") or "").strip()
+                if not overview.get("job_id") or not description:
+                    continue
+                job_id = str(overview["job_id"])
+                position = overview.get("job_position") or ""
+                content_hash = xxhash.xxh3_64_hexdigest(f"{position}\x00{description}".encode())
+                row = conn.execute("SELECT id, content_hash FROM job_postings WHERE job_id = ?", (job_id,)).fetchone()
+                if row is None:
+                    cursor = conn.execute(
+                        """
+                        INSERT INTO job_postings (job_id, position, company, location, description, content_hash, first_seen_at, updated_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                        """,
+                        (job_id, position, overview.get("company_name") or "", overview.get("job_location") or "",
+                         description, content_hash, now, now),
+                    )
+                    posting_id = cursor.lastrowid
+                    new += 1
+                elif row[1] != content_hash:
+                    posting_id = row[0]
+                    conn.execute(
+                        "UPDATE job_postings SET position = ?, description = ?, content_hash = ?, updated_at = ? WHERE id = ?",
+                        (position, description, content_hash, now, posting_id),
+                    )
+                    if self.vector_search:
+                        conn.execute("DELETE FROM job_vectors WHERE rowid = ?", (posting_id,))
+                else:
+                    posting_id = None
+                if posting_id is not None and self.vector_search:
+                    conn.execute(
+                        "INSERT INTO job_vectors (rowid, embedding) VALUES (?, ?)",
+                        (posting_id, embed([f"{position}\n{description}"])[0].tobytes()),
+                    )
+            self._sight(conn, [str(o["job_id"]) for o in overviews if o.get("job_id")], role, exp_level, geoid, now)
+        return new
+
+    @staticmethod
+    def _sight(conn, job_ids, role, exp_level, geoid, now):
+        conn.executemany(
+            """
+            INSERT INTO job_sightings (job_id, role, exp_level, geoid, seen_at) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (job_id, role, exp_level, geoid) DO UPDATE SET seen_at = excluded.seen_at
+            """,
+            [(job_id, normalize_role(role), exp_level, geoid, now) for job_id in job_ids],
+        )
+
+    def add_sightings(self, job_ids, role, exp_level, geoid):
+        # Records that already stored postings appeared in the listings for role/exp_level/geoid.
+        conn = self._conn()
+        with conn:
+            self._sight(conn, [str(job_id) for job_id in job_ids], role, exp_level, geoid, time.time())
+
+    def known(self, job_ids):
+        # Returns the subset of job_ids already stored.
+        job_ids = [str(job_id) for job_id in job_ids]
+        if not job_ids:
+            return set()
+        placeholders = ",".join("?" * len(job_ids))
+        rows = self._conn().execute(f"SELECT job_id FROM job_postings WHERE job_id IN ({placeholders})", job_ids)
+        return {row[0] for row in rows}
+
+    def _filter(self, exp_level, geoid):
+        # SQL condition (on job_postings aliased p) keeping postings listed under exp_level and geoid, when given.
+        return (
+            "EXISTS (SELECT 1 FROM job_sightings s WHERE s.job_id = p.job_id"
+            " AND (:exp_level IS NULL OR s.exp_level = :exp_level) AND (:geoid IS NULL OR s.geoid = :geoid))"
+        ), {"exp_level": exp_level, "geoid": geoid}
+
+    def _listed(self, role, exp_level, geoid, limit):
+        # Postings the listings for this role showed, most recently seen first.
+        return [row[0] for row in self._conn().execute(
+            """
+            SELECT p.id FROM job_sightings s JOIN job_postings p ON p.job_id = s.job_id
+            WHERE s.role = :role AND (:exp_level IS NULL OR s.exp_level = :exp_level) AND (:geoid IS NULL OR s.geoid = :geoid)
+            GROUP BY p.id ORDER BY MAX(s.seen_at) DESC LIMIT :limit
+            """,
+            {"role": normalize_role(role), "exp_level": exp_level, "geoid": geoid, "limit": limit},
+        )]
+
+    def _full_text(self, query, exp_level, geoid, limit):
+        # Postings containing every query term, ranked by BM25 with title matches weighted above description matches.
+        terms = normalize_role(query).split()
+        if not terms:
+            return []
+        condition, params = self._filter(exp_level, geoid)
+        return [row[0] for row in self._conn().execute(
+            f"""
+            SELECT p.id FROM job_postings_fts f JOIN job_postings p ON p.id = f.rowid
+            WHERE job_postings_fts MATCH :match AND {condition}
+            ORDER BY bm25(job_postings_fts, 10.0, 1.0) LIMIT :limit
+            """,
+            {**params, "match": " AND ".join(f'"{term}"' for term in terms), "limit": limit},
+        )]
+
+    def _nearest(self, query, exp_level, geoid, limit):
+        # Nearest postings to the query vector, restricted afterwards to the requested experience level and geo.
+        ids = [row[0] for row in self._conn().execute(
+            "SELECT rowid FROM job_vectors WHERE embedding MATCH ? AND k = ? ORDER BY distance",
+            (embed([query])[0].tobytes(), min(limit, 4096)),
+        )]
+        if not ids:
+            return []
+        condition, params = self._filter(exp_level, geoid)
+        allowed = {row[0] for row in self._conn().execute(
+            f"SELECT p.id FROM job_postings p WHERE p.id IN ({','.join(map(str, ids))}) AND {condition}", params
+        )}
+        return [posting_id for posting_id in ids if posting_id in allowed]
+
+    def search(self, query, exp_level=None, geoid=None, limit=100):
+        """
+        Returns up to limit stored postings relevant to query (a role), best first, as dicts with job_id, position,
+        company, location and description. Three rankings are fused by reciprocal rank: postings the listings for
+        the role showed, full-text matches of every query term, and (with sqlite-vec) nearest neighbours.
+        exp_level and geoid restrict results to postings listed under them.
+        """
+        candidates = 2 * limit
+        rankings = [self._listed(query, exp_level, geoid, candidates), self._full_text(query, exp_level, geoid, candidates)]
+        if self.vector_search:
+            rankings.append(self._nearest(query, exp_level, geoid, candidates))
+        scores = {}
+        for ranking in rankings:
+            for rank, posting_id in enumerate(ranking):
+                scores[posting_id] = scores.get(posting_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+        best = sorted(scores, key=lambda posting_id: -scores[posting_id])[:limit]
+        if not best:
+            return []
+        rows = self._conn().execute(
+            f"SELECT id, job_id, position, company, location, description FROM job_postings WHERE id IN ({','.join(map(str, best))})"
+        ).fetchall()
+        by_id = {row[0]: dict(zip(("job_id", "position", "company", "location", "description"), row[1:])) for row in rows}
+        return [by_id[posting_id] for posting_id in best]
+
+    def next_page(self, key):
+        row = self._conn().execute("SELECT next_page FROM crawl_progress WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 1
+
+    def set_next_page(self, key, page):
+        conn = self._conn()
+        conn.execute(
+            """
+            INSERT INTO crawl_progress (key, next_page, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET next_page = excluded.next_page, updated_at = excluded.updated_at
+            """,
+            (key, page, time.time()),
+        )
+        conn.commit()
+
+    def stats(self):
+        conn = self._conn()
+        return {
+            "postings": conn.execute("SELECT COUNT(*) FROM job_postings").fetchone()[0],
+            "listing_queries": conn.execute("SELECT COUNT(DISTINCT role || '|' || exp_level || '|' || geoid) FROM job_sightings").fetchone()[0],
+            "vector_search": self.vector_search,
+        }
+
+    def clear(self):
+        # Drops every posting, sighting and crawl position.
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM job_postings")
+            conn.execute("DELETE FROM job_sightings")
+            conn.execute("DELETE FROM crawl_progress")
+            if self.vector_search:
+                conn.execute("DELETE FROM job_vectors")
+
+
+job_corpus = JobCorpus()
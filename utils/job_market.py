@@ -0,0 +1,288 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.checkpoint_store import ThreadLocalConnections
+from utils.job_corpus import job_corpus, normalize_role
+from utils.scraper import (
+    DEFAULT_GEOID, MAX_LISTING_PAGES, evaluate_job_descriptions, fetch_job_listings, fetch_job_overviews,
+    summarize_descriptions,
+)
+from utils.telemetry import annotate, traced
+
+SUMMARY_DB_PATH = os.getenv("JOB_SUMMARY_DB_PATH", "job_summaries.db")
+# Summaries younger than this are served as-is; older ones are served stale and rebuilt in the background.
+SUMMARY_TTL = float(os.getenv("JOB_SUMMARY_TTL", str(6 * 3600)))
+REFRESH_INTERVAL = float(os.getenv("JOB_SUMMARY_REFRESH_INTERVAL", "900"))
+HOT_KEY_LIMIT = int(os.getenv("JOB_SUMMARY_HOT_KEYS", "20"))
+HOT_KEY_WINDOW = float(os.getenv("JOB_SUMMARY_HOT_WINDOW", str(7 * 24 * 3600)))
+EXP_LEVELS = ("internship", "entry_level", "associate", "mid_senior_level", "director")
+# Summaries are built from the local job corpus once it holds this many postings for the role and level.
+CORPUS_MIN_POSTINGS = int(os.getenv("JOB_CORPUS_MIN_POSTINGS", "20"))
+CORPUS_SUMMARY_POSTINGS = int(os.getenv("JOB_CORPUS_SUMMARY_POSTINGS", "200"))
+# Listing pages the background crawler fetches per role and pass (0 disables it); it starts over at page 1 after the last one.
+CRAWL_PAGES_PER_PASS = int(os.getenv("JOB_CORPUS_CRAWL_PAGES", "3"))
+CRAWL_MAX_PAGES = int(os.getenv("JOB_CORPUS_CRAWL_MAX_PAGES", str(4 * MAX_LISTING_PAGES)))
+# Summaries of never-seen keys built at once, on their own pool so they don't queue behind background crawls.
+BUILD_WORKERS = int(os.getenv("JOB_SUMMARY_BUILD_WORKERS", "4"))
+
+
+def summary_key(role, exp_level, geoid=DEFAULT_GEOID):
+    return f"{normalize_role(role)}|{exp_level}|{geoid}"
+
+
+class JobSummaryStore:
+    """
+    SQLite table of materialized job-market summaries keyed by normalized role, experience level and geo.
+    Tracks when each summary was built and how often it is requested, so the refresher can find hot keys.
+    """
+
+    def __init__(self, path=SUMMARY_DB_PATH):
+        self.path = path
+        self._conn = ThreadLocalConnections(path)
+        conn = self._conn()
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS job_summaries (
+                key TEXT PRIMARY KEY,
+                role TEXT NOT NULL,
+                exp_level TEXT NOT NULL,
+                geoid TEXT NOT NULL,
+                summary TEXT,
+                refreshed_at REAL,
+                last_requested_at REAL NOT NULL,
+                request_count INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS job_summaries_hot ON job_summaries (last_requested_at, request_count);
+            """
+        )
+        conn.commit()
+
+    def get(self, role, exp_level, geoid=DEFAULT_GEOID):
+        """
+        Returns (summary, refreshed_at) for the key, or None if it has never been built.
+        """
+        row = self._conn().execute(
+            "SELECT summary, refreshed_at FROM job_summaries WHERE key = ? AND summary IS NOT NULL",
+            (summary_key(role, exp_level, geoid),),
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def touch(self, role, exp_level, geoid=DEFAULT_GEOID):
+        # Records a request for the key so it counts towards the hot set, creating the row if needed.
+        conn = self._conn()
+        conn.execute(
+            """
+            INSERT INTO job_summaries (key, role, exp_level, geoid, last_requested_at, request_count)
+            VALUES (?, ?, ?, ?, ?, 1)
+            ON CONFLICT(key) DO UPDATE SET last_requested_at = excluded.last_requested_at,
+                                           request_count = request_count + 1
+            """,
+            (summary_key(role, exp_level, geoid), normalize_role(role), exp_level, geoid, time.time()),
+        )
+        conn.commit()
+
+    def put(self, role, exp_level, geoid, summary):
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            """
+            INSERT INTO job_summaries (key, role, exp_level, geoid, summary, refreshed_at, last_requested_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET summary = excluded.summary, refreshed_at = excluded.refreshed_at
+            """,
+            (summary_key(role, exp_level, geoid), normalize_role(role), exp_level, geoid, json.dumps(summary), now, now),
+        )
+        conn.commit()
+
+    def hot_keys(self, limit=HOT_KEY_LIMIT, window=HOT_KEY_WINDOW):
+        """
+        Returns (role, exp_level, geoid, refreshed_at) for the most requested keys seen within the window.
+        """
+        return self._conn().execute(
+            """
+            SELECT role, exp_level, geoid, refreshed_at FROM job_summaries
+            WHERE last_requested_at >= ?
+            ORDER BY request_count DESC LIMIT ?
+            """,
+            (time.time() - window, limit),
+        ).fetchall()
+
+    def clear(self):
+        # Drops every stored summary and its request statistics.
+        conn = self._conn()
+        conn.execute("DELETE FROM job_summaries")
+        conn.commit()
+
+
+summary_store = JobSummaryStore()
+_revalidation_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="job-summary")
+_build_pool = ThreadPoolExecutor(max_workers=BUILD_WORKERS, thread_name_prefix="job-summary-build")
+# Future of every queued or running job, by key.
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+@traced(kind="job_market")
+def crawl_role(role, exp_level, geoid=DEFAULT_GEOID, pages=CRAWL_PAGES_PER_PASS):
+    """
+    Background pagination into the job corpus: fetches the next pages of the role's listings, continuing where the
+    previous pass stopped, and stores every posting not yet in the corpus. Postings already stored are only
+    recorded as seen again, without fetching their overviews. Once the listings run out or CRAWL_MAX_PAGES is
+    reached, the next pass starts over at page 1 to pick up new postings. Returns the number of new postings.
+    """
+    key = summary_key(role, exp_level, geoid)
+    page = job_corpus.next_page(key)
+    new = 0
+    for page in range(page, page + pages):
+        listings = fetch_job_listings(role, exp_level, geoid=geoid, page=page) if page <= CRAWL_MAX_PAGES else None
+        if not listings or not isinstance(listings, list):
+            page = 0
+            break
+        job_ids = list(dict.fromkeys(str(job["job_id"]) for job in listings if isinstance(job, dict) and job.get("job_id")))
+        known = job_corpus.known(job_ids)
+        job_corpus.add_sightings(known, role, exp_level, geoid)
+        new += job_corpus.add(fetch_job_overviews([job_id for job_id in job_ids if job_id not in known]), role, exp_level, geoid)
+    job_corpus.set_next_page(key, page + 1)
+    annotate(new_postings=new)
+    return new
+
+
+@traced(kind="job_market")
+def summarize_from_corpus(role, exp_level, geoid=DEFAULT_GEOID, limit=CORPUS_SUMMARY_POSTINGS):
+    # Builds the summary from the most relevant stored postings, without scraping.
+    # Returns None when the corpus holds fewer than CORPUS_MIN_POSTINGS postings for the role and level.
+    postings = job_corpus.search(role, exp_level=exp_level, geoid=geoid, limit=limit)
+    annotate(corpus_postings=len(postings))
+    if len(postings) < CORPUS_MIN_POSTINGS:
+        return None
+    return summarize_descriptions([posting["description"] for posting in postings])
+
+
+def rebuild_summary(role, exp_level, geoid=DEFAULT_GEOID, crawl=True):
+    # Rebuilds one summary and stores it; failed (empty) extractions keep the previous summary.
+    # With crawl, the role's next listing pages are crawled into the corpus first. The summary comes from the corpus
+    # when it holds enough postings, and from scraping the top listings otherwise (which also adds them to the corpus).
+    if crawl:
+        crawl_role(role, exp_level, geoid)
+    summary = summarize_from_corpus(role, exp_level, geoid) or evaluate_job_descriptions(role, exp_level, geoid=geoid)
+    if summary:
+        summary_store.put(role, exp_level, geoid, summary)
+    return summary
+
+
+def _run_scheduled(key, func, *args):
+    try:
+        return func(*args)
+    except Exception as e:
+        print(f"Background job failed for {key}: {e}")
+        raise
+    finally:
+        with _in_flight_lock:
+            del _in_flight[key]
+
+
+def _schedule(key, func, *args, pool=_revalidation_pool):
+    """
+    Queues func on pool unless a job with the same key is already queued or running.
+    Returns (future, queued), where future is the job's own or the one already in flight for key.
+    """
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        if future is not None:
+            return future, False
+        future = _in_flight[key] = pool.submit(_run_scheduled, key, func, *args)
+        return future, True
+
+
+def schedule_refresh(role, exp_level, geoid=DEFAULT_GEOID):
+    # Queues a background crawl and rebuild unless one is already running for the same key.
+    return _schedule(summary_key(role, exp_level, geoid), rebuild_summary, role, exp_level, geoid)[1]
+
+
+def schedule_crawl(role, exp_level, geoid=DEFAULT_GEOID):
+    # Queues a background crawl of the role's next listing pages unless one is already running for the same key.
+    if CRAWL_PAGES_PER_PASS <= 0:
+        return False
+    return _schedule(f"crawl|{summary_key(role, exp_level, geoid)}", crawl_role, role, exp_level, geoid)[1]
+
+
+def _build_summary(role, exp_level, geoid):
+    # First build of a key: from the job corpus when it already holds enough postings, with the crawl in the background.
+    summary = rebuild_summary(role, exp_level, geoid, crawl=False)
+    schedule_crawl(role, exp_level, geoid)
+    return summary
+
+
+@traced(kind="job_market")
+def get_job_summary(field, exp_level, geoid=DEFAULT_GEOID):
+    # Returns the JobDesc summary for a role from the materialized store.
+    # Fresh summaries are returned directly; stale ones are returned immediately while a background rebuild runs
+    # (stale-while-revalidate). Only a never-seen key makes its caller wait for scraping and extraction; concurrent
+    # callers for the same key wait on that one build.
+    summary_store.touch(field, exp_level, geoid)
+    stored = summary_store.get(field, exp_level, geoid)
+    if stored is None:
+        annotate(source="built")
+        # Built in a copy of the caller's context, so its cache mode and telemetry spans apply.
+        future, _ = _schedule(
+            f"build|{summary_key(field, exp_level, geoid)}", contextvars.copy_context().run, _build_summary, field, exp_level, geoid,
+            pool=_build_pool,
+        )
+        return future.result()
+    summary, refreshed_at = stored
+    stale = time.time() - refreshed_at > SUMMARY_TTL
+    annotate(source="stale" if stale else "fresh", cache_hit=True)
+    if stale:
+        schedule_refresh(field, exp_level, geoid)
+    return summary
+
+
+class SummaryRefresher(threading.Thread):
+    """
+    Daemon thread that periodically rebuilds the hottest role summaries before they go stale,
+    so interactive requests for popular roles are served from the store.
+    """
+
+    def __init__(self, interval=REFRESH_INTERVAL, limit=HOT_KEY_LIMIT):
+        super().__init__(name="job-summary-refresher", daemon=True)
+        self.interval = interval
+        self.limit = limit
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.refresh_once()
+            self._stop_event.wait(self.interval)
+
+    def refresh_once(self):
+        # Rebuilds hot keys that are missing or will expire before the next pass, and crawls the next listing pages
+        # of the others so the job corpus keeps growing.
+        horizon = time.time() - SUMMARY_TTL + self.interval
+        for role, exp_level, geoid, refreshed_at in summary_store.hot_keys(self.limit):
+            if refreshed_at is None or refreshed_at < horizon:
+                schedule_refresh(role, exp_level, geoid)
+            else:
+                schedule_crawl(role, exp_level, geoid)
+
+    def stop(self):
+        self._stop_event.set()
+
+
+_refresher = None
+_refresher_lock = threading.Lock()
+
+
+def start_background_refresher(interval=REFRESH_INTERVAL, limit=HOT_KEY_LIMIT):
+    # Starts the process-wide refresher thread once and returns it.
+    global _refresher
+    with _refresher_lock:
+        if _refresher is None or not _refresher.is_alive():
+            _refresher = SummaryRefresher(interval, limit)
+            _refresher.start()
+        return _refresher
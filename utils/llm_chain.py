@@ -3,13 +3,19 @@ load_dotenv()
 
 from langchain_openai import OpenAI
 from langchain.prompts import PromptTemplate
-from langgraph.graph import StateGraph
+from langchain_core.runnables import RunnableLambda
 
-from langgraph.graph import StateGraph
-from langgraph.checkpoint.sqlite import SqliteSaver
-import sqlite3
-from typing import TypedDict, List
+from langgraph.graph import StateGraph, START, END
+from langgraph.config import get_stream_writer
+from typing import Annotated, Dict, TypedDict, List
 import streamlit as st
+from utils.cache import cached_completion, acached_completion, get_cache_mode
+from utils.checkpoint_store import PooledSqliteSaver
+from utils.fit_scoring import FitScore, score_profile
+from utils.incremental import node_fingerprint, plan_nodes
+from utils.profile_projection import compact_job_desc, compact_output, compact_profile
+from utils.telemetry import traced
+from utils.tokens import count_tokens
 
 # Shared LLM
 llm = OpenAI(temperature=0.1, model="gpt-4o-mini")
@@ -23,16 +29,114 @@ class JobDesc(TypedDict):
     industry_practices: List[str]
     highlights: List[str]
 
+def merge_counts(current: Dict[str, int], update: Dict[str, int]) -> Dict[str, int]:
+    # Reducer for per-node counters written by parallel nodes in the same superstep.
+    return {**(current or {}), **(update or {})}
+
+class RunPlan(TypedDict):
+    recomputed: List[str]
+    reused: List[str]
+    changed_sections: List[str]
+
 # 2. Define state schema for the graph
 class LinkedInState(TypedDict):
     profile: dict
     job_desc: JobDesc
     analysis: str
     fit: str
+    fit_score: FitScore
     rewrite: str
     counseling: str
+    prompt_tokens: Annotated[Dict[str, int], merge_counts]
+    # Fingerprint of the inputs each node's stored output was computed from, written by the node itself.
+    node_inputs: Annotated[Dict[str, str], merge_counts]
+    # Section fingerprints of the latest inputs, and which nodes the latest run recomputed or reused.
+    input_sections: Dict[str, str]
+    run_plan: RunPlan
+
+def _stream_writer():
+    # Returns the graph's custom stream writer, or a no-op when called outside a graph run.
+    try:
+        return get_stream_writer()
+    except RuntimeError:
+        return lambda chunk: None
+
+def generate(node: str, prompt: str) -> str:
+    """
+    Streams a completion for the prompt, emitting each token on the graph's "custom" stream as {"node", "token"}.
+    Byte-identical prompts are answered from the completion cache and emitted as a single chunk.
+    Returns the full completion text, identical to what llm.invoke would return.
+    """
+    writer = _stream_writer()
+    computed = False
+
+    def stream() -> str:
+        nonlocal computed
+        computed = True
+        parts = []
+        for token in llm.stream(prompt):
+            parts.append(token)
+            writer({"node": node, "token": token})
+        return "".join(parts)
+
+    result = cached_completion(llm, prompt, stream, label=node)
+    if not computed:
+        writer({"node": node, "token": result})
+    return result
+
+async def agenerate(node: str, prompt: str) -> str:
+    """
+    Async variant of generate.
+    """
+    writer = _stream_writer()
+    computed = False
+
+    async def stream() -> str:
+        nonlocal computed
+        computed = True
+        parts = []
+        async for token in llm.astream(prompt):
+            parts.append(token)
+            writer({"node": node, "token": token})
+        return "".join(parts)
+
+    result = await acached_completion(llm, prompt, stream, label=node)
+    if not computed:
+        writer({"node": node, "token": result})
+    return result
 
 # Agent functions now accept and return updates, no side-effects
+ANALYSIS_PROMPT = PromptTemplate(
+    input_variables=["profile"],
+    template="""
+    You are a highly experienced LinkedIn profile optimization expert and career coach.
+    Your task is to thoroughly analyze the provided LinkedIn profile data.
+    Identify and articulate specific gaps, inconsistencies, redundant information, and missing keywords
+    across sections like 'About', 'Experience', 'Skills', 'Headline', and 'Summary'.
+
+    For each identified area, provide actionable, concise, and professional suggestions for improvement.
+    Highlight opportunities to:
+    - Incorporate powerful action verbs.
+    - Quantify achievements with metrics (e.g., percentages, numbers, monetary values).
+    - Integrate relevant industry-specific keywords for enhanced searchability.
+    - Streamline language for clarity and impact.
+    - Ensure a compelling narrative that showcases value.
+
+    Present your analysis in a structured, bullet-point format, focusing on direct improvements.
+
+    ---
+    Profile Data:
+    {profile}
+
+    ---
+    Professional Profile Analysis and Improvement Suggestions:
+    """
+)
+
+def build_analysis_prompt(state: LinkedInState) -> str:
+    # Builds the analysis prompt from the compact, token-budgeted profile projection.
+    return ANALYSIS_PROMPT.format(profile=compact_profile(state["profile"]))
+
 def analyze_profile(state: LinkedInState) -> dict:
     """
     Performs a comprehensive analysis of the user's LinkedIn profile.
@@ -40,72 +144,111 @@ def analyze_profile(state: LinkedInState) -> dict:
     Provides actionable, structured suggestions to enhance professional presentation and keyword optimization.
     Returns a dictionary containing the analysis results.
     """
-    prompt = PromptTemplate(
-        input_variables=["profile"],
-        template="""
-        You are a highly experienced LinkedIn profile optimization expert and career coach.
-        Your task is to thoroughly analyze the provided LinkedIn profile data.
-        Identify and articulate specific gaps, inconsistencies, redundant information, and missing keywords
-        across sections like 'About', 'Experience', 'Skills', 'Headline', and 'Summary'.
-
-        For each identified area, provide actionable, concise, and professional suggestions for improvement.
-        Highlight opportunities to:
-        - Incorporate powerful action verbs.
-        - Quantify achievements with metrics (e.g., percentages, numbers, monetary values).
-        - Integrate relevant industry-specific keywords for enhanced searchability.
-        - Streamline language for clarity and impact.
-        - Ensure a compelling narrative that showcases value.
-
-        Present your analysis in a structured, bullet-point format, focusing on direct improvements.
-
-        ---
-        Profile Data:
-        {profile}
-
-        ---
-        Professional Profile Analysis and Improvement Suggestions:
-        """
-    )
-    result = llm.invoke(prompt.format(profile=state["profile"]))
-    return {"analysis": result}
+    prompt = build_analysis_prompt(state)
+    result = generate("analysis", prompt)
+    return {"analysis": result, "prompt_tokens": {"analysis": count_tokens(prompt)}}
+
+async def aanalyze_profile(state: LinkedInState) -> dict:
+    """
+    Async variant of analyze_profile, used when the graph is run with ainvoke/astream.
+    """
+    prompt = build_analysis_prompt(state)
+    result = await agenerate("analysis", prompt)
+    return {"analysis": result, "prompt_tokens": {"analysis": count_tokens(prompt)}}
+
+FIT_PROMPT = PromptTemplate(
+    input_variables=["profile", "job_desc", "fit_score"],
+    template="""
+    You are an expert in precise job fit analysis, specializing in LinkedIn profile alignment.
+    Your task is to meticulously compare the provided LinkedIn profile data against the target job description.
+
+    Perform the following analysis:
+    1.  **Explain the Match Score:** A deterministic scoring engine has already computed the match score (0-100), the matched and missing skills, and how well each profile section covers the required skills (see "Computed Fit Score" below). Report that score as-is and explain what drives it; do not invent a different score.
+    2.  **Identify Missing Qualifications/Skills:** Starting from the computed missing skills, detail specific skills, experiences, or qualifications present in the job description but absent or insufficiently highlighted in the profile.
+    3.  **Suggest Improvements for Better Alignment:** Offer concrete, actionable advice on how the profile could be enhanced to better match the job description. This includes:
+        - Recommending specific keywords from the job description to integrate.
+        - Highlighting transferable skills that can be emphasized.
+        - Suggesting areas where achievements could be rephrased to fit the role's needs.
+    4.  **Headline Keyword Recommendation:** Propose concise, impactful keywords or phrases for the LinkedIn headline that would immediately signal relevance for this target role.
+
+    Maintain a professional, direct, and actionable tone throughout your analysis.
+
+    ---
+    LinkedIn Profile Data:
+    {profile}
+
+    ---
+    Target Job Description:
+    {job_desc}
+
+    ---
+    Computed Fit Score:
+    {fit_score}
+
+    ---
+    Job Fit Analysis:
+    """
+)
+
+def build_fit_prompt(state: LinkedInState, fit_score: FitScore) -> str:
+    return FIT_PROMPT.format(profile=compact_profile(state["profile"]), job_desc=compact_job_desc(state["job_desc"]), fit_score=fit_score)
 
 def job_fit_analysis(state: LinkedInState) -> dict:
     """
     Compares the user's LinkedIn profile against the target job description.
-    Generates a quantitative match score, highlights missing qualifications or skills, and recommends improvements for better alignment.
-    Returns a dictionary with the fit analysis.
-    """
-    prompt = PromptTemplate(
-        input_variables=["profile", "job_desc"],
-        template="""
-        You are an expert in precise job fit analysis, specializing in LinkedIn profile alignment.
-        Your task is to meticulously compare the provided LinkedIn profile data against the target job description.
-
-        Perform the following analysis:
-        1.  **Generate a Match Score (70-100):** Provide a quantitative assessment of how well the profile aligns with the job requirements.
-        2.  **Identify Missing Qualifications/Skills:** Detail specific skills, experiences, or qualifications present in the job description but absent or insufficiently highlighted in the profile.
-        3.  **Suggest Improvements for Better Alignment:** Offer concrete, actionable advice on how the profile could be enhanced to better match the job description. This includes:
-            - Recommending specific keywords from the job description to integrate.
-            - Highlighting transferable skills that can be emphasized.
-            - Suggesting areas where achievements could be rephrased to fit the role's needs.
-        4.  **Headline Keyword Recommendation:** Propose concise, impactful keywords or phrases for the LinkedIn headline that would immediately signal relevance for this target role.
-
-        Maintain a professional, direct, and actionable tone throughout your analysis.
-
-        ---
-        LinkedIn Profile Data:
-        {profile}
-
-        ---
-        Target Job Description:
-        {job_desc}
-
-        ---
-        Job Fit Analysis:
-        """
-    )
-    result = llm.invoke(prompt.format(profile=state["profile"], job_desc=state["job_desc"]))
-    return {"fit": result}
+    Computes a deterministic match score with the fit scoring engine, then has the LLM explain it, highlight missing
+    qualifications or skills, and recommend improvements for better alignment.
+    Returns a dictionary with the fit analysis and the computed score.
+    """
+    fit_score = score_profile(state["profile"], state["job_desc"])
+    prompt = build_fit_prompt(state, fit_score)
+    result = generate("fit", prompt)
+    return {"fit": result, "fit_score": fit_score, "prompt_tokens": {"fit": count_tokens(prompt)}}
+
+async def ajob_fit_analysis(state: LinkedInState) -> dict:
+    """
+    Async variant of job_fit_analysis.
+    """
+    fit_score = score_profile(state["profile"], state["job_desc"])
+    prompt = build_fit_prompt(state, fit_score)
+    result = await agenerate("fit", prompt)
+    return {"fit": result, "fit_score": fit_score, "prompt_tokens": {"fit": count_tokens(prompt)}}
+
+REWRITE_PROMPT = PromptTemplate(
+    input_variables=["profile", "job_desc"],
+    template="""
+    You are a top-tier LinkedIn content optimization specialist, adept at crafting compelling narratives.
+    Your objective is to rewrite the designated sections of the provided LinkedIn profile to be highly
+    concise, impactful, and precisely aligned with both industry best practices and the target job description.
+
+    Focus on the following sections: 'About', 'Experience' (for relevant roles), 'Skills', and 'Headline'.
+
+    Ensure the rewrite incorporates:
+    - **Strategic Keyword Integration:** Naturally weave in all relevant keywords from the job description.
+    - **Quantifiable Achievements:** Transform responsibilities into measurable accomplishments (e.g., "Increased X by Y%", "Managed Z projects achieving A").
+    - **Powerful Action Verbs:** Start sentences and bullet points with strong, dynamic verbs.
+    - **Concise & Scannable Language:** Optimize for readability by recruiters (mix of short paragraphs and bullet points).
+    - **Tailored Content:** Adjust the tone and emphasis to directly appeal to the hiring manager for the target role.
+    - **Industry-Specific Resonance:** Ensure the language reflects current industry trends and norms.
+    - **Compelling Narrative:** The 'About' section should clearly articulate value proposition and career goals.
+
+    Provide the rewritten sections clearly demarcated.
+
+    ---
+    Current LinkedIn Profile Data:
+    {profile}
+
+    ---
+    Target Job Description (for alignment):
+    {job_desc}
+
+    ---
+    Rewritten LinkedIn Profile Sections:
+    """
+)
+
+def build_rewrite_prompt(state: LinkedInState) -> str:
+    return REWRITE_PROMPT.format(profile=compact_profile(state["profile"]), job_desc=compact_job_desc(state["job_desc"]))
 
 def rewrite_sections(state: LinkedInState) -> dict:
     """
@@ -113,40 +256,69 @@ def rewrite_sections(state: LinkedInState) -> dict:
     Ensures integration of relevant keywords, quantifiable achievements, and compelling narrative.
     Returns a dictionary with the rewritten sections.
     """
-    prompt = PromptTemplate(
-        input_variables=["profile", "job_desc"],
-        template="""
-        You are a top-tier LinkedIn content optimization specialist, adept at crafting compelling narratives.
-        Your objective is to rewrite the designated sections of the provided LinkedIn profile to be highly
-        concise, impactful, and precisely aligned with both industry best practices and the target job description.
-
-        Focus on the following sections: 'About', 'Experience' (for relevant roles), 'Skills', and 'Headline'.
-
-        Ensure the rewrite incorporates:
-        - **Strategic Keyword Integration:** Naturally weave in all relevant keywords from the job description.
-        - **Quantifiable Achievements:** Transform responsibilities into measurable accomplishments (e.g., "Increased X by Y%", "Managed Z projects achieving A").
-        - **Powerful Action Verbs:** Start sentences and bullet points with strong, dynamic verbs.
-        - **Concise & Scannable Language:** Optimize for readability by recruiters (mix of short paragraphs and bullet points).
-        - **Tailored Content:** Adjust the tone and emphasis to directly appeal to the hiring manager for the target role.
-        - **Industry-Specific Resonance:** Ensure the language reflects current industry trends and norms.
-        - **Compelling Narrative:** The 'About' section should clearly articulate value proposition and career goals.
-
-        Provide the rewritten sections clearly demarcated.
-
-        ---
-        Current LinkedIn Profile Data:
-        {profile}
-
-        ---
-        Target Job Description (for alignment):
-        {job_desc}
-
-        ---
-        Rewritten LinkedIn Profile Sections:
-        """
+    prompt = build_rewrite_prompt(state)
+    result = generate("rewrite", prompt)
+    return {"rewrite": result, "prompt_tokens": {"rewrite": count_tokens(prompt)}}
+
+async def arewrite_sections(state: LinkedInState) -> dict:
+    """
+    Async variant of rewrite_sections.
+    """
+    prompt = build_rewrite_prompt(state)
+    result = await agenerate("rewrite", prompt)
+    return {"rewrite": result, "prompt_tokens": {"rewrite": count_tokens(prompt)}}
+
+COUNSELING_PROMPT = PromptTemplate(
+    input_variables=["profile", "job_desc", "analysis", "fit", "rewrite"],
+    template="""
+    You are a seasoned and insightful career counselor with extensive knowledge of current industry trends and learning resources.
+    Your primary role is to provide actionable and strategic career guidance based on the candidate's LinkedIn profile and the target job description.
+
+    Leverage the provided profile analysis, job fit assessment, and rewritten profile sections to offer comprehensive advice.
+
+    Specifically:
+    1.  **Identify Critical Skill Gaps:** Pinpoint specific technical, soft, or domain-specific skills that are essential for the target role but appear to be missing or underdeveloped in the profile.
+    2.  **Suggest Learning Resources & Certifications:** Recommend reputable online courses (e.g., Coursera, edX, LinkedIn Learning), certifications, bootcamps, or platforms to acquire identified missing skills. Be specific where possible.
+    3.  **Advise on Strategic Career Paths:** Beyond the immediate job, suggest potential next steps or alternative career trajectories that align with the candidate's existing strengths and the demands of the target industry.
+    4.  **Guidance for Excelling in the Role:** Provide practical advice on how to effectively prepare for and succeed in the target role, including interview tips, networking strategies, and ways to demonstrate ongoing value.
+    5.  **Personal Branding Advice:** Offer insights on maintaining and growing a strong professional brand on LinkedIn and beyond.
+
+    Deliver your advice in a professional, encouraging, and highly actionable manner.
+
+    ---
+    LinkedIn Profile Data (for full context):
+    {profile}
+
+    ---
+    Target Job Description:
+    {job_desc}
+
+    ---
+    Previous Profile Analysis:
+    {analysis}
+
+    ---
+    Job Fit Assessment:
+    {fit}
+
+    ---
+    Rewritten Profile Sections:
+    {rewrite}
+
+    ---
+    Comprehensive Career Counseling:
+    """
+)
+
+def build_counseling_prompt(state: LinkedInState) -> str:
+    # Earlier node outputs are trimmed too, since counseling re-sends all three of them.
+    return COUNSELING_PROMPT.format(
+        profile=compact_profile(state["profile"]),
+        job_desc=compact_job_desc(state["job_desc"]),
+        analysis=compact_output(state["analysis"]),
+        fit=compact_output(state["fit"]),
+        rewrite=compact_output(state["rewrite"]),
     )
-    result = llm.invoke(prompt.format(profile=state["profile"], job_desc=state["job_desc"]))
-    return {"rewrite": result}
 
 def career_counseling(state: LinkedInState) -> dict:
     """
@@ -154,69 +326,91 @@ def career_counseling(state: LinkedInState) -> dict:
     Identifies skill gaps, recommends learning resources, suggests career paths, and provides actionable advice for professional growth and personal branding.
     Returns a dictionary with the counseling output.
     """
-    prompt = PromptTemplate(
-        input_variables=["profile", "job_desc", "analysis", "fit", "rewrite"],
-        template="""
-        You are a seasoned and insightful career counselor with extensive knowledge of current industry trends and learning resources.
-        Your primary role is to provide actionable and strategic career guidance based on the candidate's LinkedIn profile and the target job description.
+    prompt = build_counseling_prompt(state)
+    result = generate("counseling", prompt)
+    return {"counseling": result, "prompt_tokens": {"counseling": count_tokens(prompt)}}
 
-        Leverage the provided profile analysis, job fit assessment, and rewritten profile sections to offer comprehensive advice.
+async def acareer_counseling(state: LinkedInState) -> dict:
+    """
+    Async variant of career_counseling.
+    """
+    prompt = build_counseling_prompt(state)
+    result = await agenerate("counseling", prompt)
+    return {"counseling": result, "prompt_tokens": {"counseling": count_tokens(prompt)}}
 
-        Specifically:
-        1.  **Identify Critical Skill Gaps:** Pinpoint specific technical, soft, or domain-specific skills that are essential for the target role but appear to be missing or underdeveloped in the profile.
-        2.  **Suggest Learning Resources & Certifications:** Recommend reputable online courses (e.g., Coursera, edX, LinkedIn Learning), certifications, bootcamps, or platforms to acquire identified missing skills. Be specific where possible.
-        3.  **Advise on Strategic Career Paths:** Beyond the immediate job, suggest potential next steps or alternative career trajectories that align with the candidate's existing strengths and the demands of the target industry.
-        4.  **Guidance for Excelling in the Role:** Provide practical advice on how to effectively prepare for and succeed in the target role, including interview tips, networking strategies, and ways to demonstrate ongoing value.
-        5.  **Personal Branding Advice:** Offer insights on maintaining and growing a strong professional brand on LinkedIn and beyond.
+NODE_PROMPTS = {"analysis": ANALYSIS_PROMPT, "fit": FIT_PROMPT, "rewrite": REWRITE_PROMPT, "counseling": COUNSELING_PROMPT}
 
-        Deliver your advice in a professional, encouraging, and highly actionable manner.
+def input_fingerprint(node: str, state: LinkedInState, sections: Dict[str, str] = None) -> str:
+    # A prompt template change invalidates the outputs built from the old one.
+    return node_fingerprint(node, state, salt=NODE_PROMPTS[node].template, sections=sections)
 
-        ---
-        LinkedIn Profile Data (for full context):
-        {profile}
+def plan_run(state: LinkedInState) -> dict:
+    """
+    Entry node: compares the new profile and job summary section by section with the inputs the stored outputs of
+    this thread were computed from, and decides which nodes rerun (see utils.incremental.plan_nodes).
+    Regenerating (any cache mode other than "use") reruns every node.
+    Reused outputs are written back unchanged, so they reach clients on the "updates" stream like recomputed ones.
+    """
+    plan = plan_nodes(state, input_fingerprint, force=get_cache_mode() != "use")
+    update = {
+        "input_sections": plan["sections"],
+        "run_plan": {key: plan[key] for key in ("recomputed", "reused", "changed_sections")},
+    }
+    for node in plan["reused"]:
+        update[node] = state[node]
+        if node == "fit":
+            update["fit_score"] = state.get("fit_score")
+    return update
+
+def route_plan(state: LinkedInState) -> List[str]:
+    # Starts the recomputed nodes; counseling alone is started directly, and nothing to recompute ends the run.
+    recomputed = state["run_plan"]["recomputed"]
+    return [node for node in PARALLEL_NODES if node in recomputed] or (["counseling"] if "counseling" in recomputed else [END])
 
-        ---
-        Target Job Description:
-        {job_desc}
+# 3. Build the StateGraph
 
-        ---
-        Previous Profile Analysis:
-        {analysis}
+# analysis, fit and rewrite only read the inputs, so they run as one parallel superstep; counseling joins on all three.
+PARALLEL_NODES = {
+    "analysis": (analyze_profile, aanalyze_profile),
+    "fit": (job_fit_analysis, ajob_fit_analysis),
+    "rewrite": (rewrite_sections, arewrite_sections),
+}
 
-        ---
-        Job Fit Assessment:
-        {fit}
+def _node(name, func, afunc):
+    # Wraps a node's sync and async implementations in a "node.<name>" telemetry span, and records the fingerprint
+    # of the inputs its output was computed from so later runs can reuse it.
+    def run(state):
+        return {**func(state), "node_inputs": {name: input_fingerprint(name, state)}}
 
-        ---
-        Rewritten Profile Sections:
-        {rewrite}
+    async def arun(state):
+        return {**(await afunc(state)), "node_inputs": {name: input_fingerprint(name, state)}}
 
-        ---
-        Comprehensive Career Counseling:
-        """
-    )
-    result = llm.invoke(prompt.format(profile=state["profile"], job_desc=state["job_desc"],analysis=state["analysis"], fit=state["fit"], rewrite=state["rewrite"]))
-    return {"counseling": result}
+    return RunnableLambda(traced(f"node.{name}", kind="node")(run), afunc=traced(f"node.{name}", kind="node")(arun), name=name)
 
-# 3. Build the StateGraph
+def build_graph() -> StateGraph:
+    """
+    Defines the LinkedIn optimization workflow: the plan node decides which nodes the new inputs invalidate, then
+    fans out the invalidated ones among analysis, fit and rewrite in parallel, and any of them leads to counseling.
+    Each node carries both a sync and an async implementation, so the graph works with invoke/stream and ainvoke/astream.
+    """
+    graph = StateGraph(LinkedInState)
+    graph.add_node("plan", traced("node.plan", kind="node")(plan_run))
+    graph.add_edge(START, "plan")
+    graph.add_conditional_edges("plan", route_plan, [*PARALLEL_NODES, "counseling", END])
+    for name, (func, afunc) in PARALLEL_NODES.items():
+        graph.add_node(name, _node(name, func, afunc))
+        # Nodes started together finish in the same superstep, so counseling still runs once after all of them.
+        graph.add_edge(name, "counseling")
+    graph.add_node("counseling", _node("counseling", career_counseling, acareer_counseling))
+    graph.set_finish_point("counseling")
+    return graph
 
 @st.cache_resource
 def get_langgraph_app():
     """
-    Constructs and compiles the LinkedIn optimization workflow as a stateful graph.
-    Initializes persistent storage for checkpoints, defines the sequence of analysis nodes, and sets entry and exit points.
+    Compiles the LinkedIn optimization workflow with persistent checkpoint storage.
+    The checkpointer gives each thread its own WAL-mode connection to linkedin_memory.db, so concurrent sessions
+    do not serialize on one connection.
     Returns the compiled graph application for use in the Streamlit interface.
     """
-    conn = sqlite3.connect("linkedin_memory.db", check_same_thread=False)
-    saver = SqliteSaver(conn)
-    graph = StateGraph(LinkedInState)
-    graph.add_node("analysis", analyze_profile)
-    graph.add_node("fit", job_fit_analysis)
-    graph.add_node("rewrite", rewrite_sections)
-    graph.add_node("counseling", career_counseling)
-    graph.set_entry_point("analysis")
-    graph.set_finish_point("counseling")
-    graph.add_edge("analysis", "fit")
-    graph.add_edge("fit", "rewrite")
-    graph.add_edge("rewrite", "counseling")
-    return graph.compile(checkpointer=saver)
+    return build_graph().compile(checkpointer=PooledSqliteSaver())
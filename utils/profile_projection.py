@@ -0,0 +1,112 @@
+import json
+import os
+
+from utils.tokens import count_tokens, truncate_to_tokens
+
+# Token budget per projected profile section; override any of them with PROFILE_SECTION_BUDGETS='{"about": 300}'.
+SECTION_TOKEN_BUDGETS = {
+    "headline": 80,
+    "location": 20,
+    "about": 400,
+    "experience": 1200,
+    "skills": 200,
+    "education": 150,
+    "certifications": 150,
+    "projects": 400,
+    "languages": 40,
+}
+SECTION_TOKEN_BUDGETS.update(json.loads(os.getenv("PROFILE_SECTION_BUDGETS", "{}")))
+JOB_DESC_TOKEN_BUDGET = int(os.getenv("JOB_DESC_TOKEN_BUDGET", "1500"))
+# Budget for each earlier node output that career_counseling re-sends.
+PRIOR_OUTPUT_TOKEN_BUDGET = int(os.getenv("PRIOR_OUTPUT_TOKEN_BUDGET", "700"))
+
+JOB_FIELDS = ("position", "skills", "responsibilities", "qualifications", "industry_practices", "highlights")
+
+
+def _unwrap(profile):
+    # ScrapingDog returns the profile as a one-element list.
+    if isinstance(profile, list):
+        profile = profile[0] if profile else {}
+    return profile if isinstance(profile, dict) else {}
+
+
+def _join(values, sep="\n"):
+    return sep.join(str(v) for v in values if v)
+
+
+def _entries(value):
+    return [entry for entry in value if isinstance(entry, dict)] if isinstance(value, list) else []
+
+
+def profile_sections(profile):
+    """
+    Projects a scraped profile dict down to plain text per section (headline, location, about, experience, skills,
+    education, certifications, projects, languages), dropping image URLs, internal ids, activity feeds,
+    similar profiles and other fields that carry no signal for the optimizer.
+    """
+    profile = _unwrap(profile)
+    skills = profile.get("skills") or []
+    languages = profile.get("languages") or []
+    return {
+        "headline": profile.get("headline") or "",
+        "location": profile.get("location") or "",
+        "about": profile.get("about") or "",
+        "experience": _join(
+            _join([e.get("position"), e.get("company_name"), e.get("duration"), e.get("summary") or e.get("description")], " | ")
+            for e in _entries(profile.get("experience"))
+        ),
+        "skills": _join(skills, ", ") if isinstance(skills, list) else str(skills),
+        "education": _join(
+            _join([e.get("college_degree"), e.get("college_degree_field"), e.get("college_name"), e.get("college_duration")], " | ")
+            for e in _entries(profile.get("education"))
+        ),
+        "certifications": _join(
+            _join([e.get("name") or e.get("title"), e.get("organization") or e.get("authority")], " | ")
+            for e in _entries(profile.get("certification"))
+        ),
+        "projects": _join(
+            _join([e.get("title") or e.get("name"), e.get("description") or e.get("summary")], " | ")
+            for e in _entries(profile.get("projects"))
+        ),
+        "languages": _join((l.get("name") if isinstance(l, dict) else l for l in languages), ", ")
+        if isinstance(languages, list) else str(languages),
+    }
+
+
+def compact_profile(profile, budgets=None):
+    """
+    Renders the projected profile as labelled sections, each trimmed to its token budget. Empty sections are omitted.
+    """
+    budgets = {**SECTION_TOKEN_BUDGETS, **(budgets or {})}
+    lines = []
+    for name, text in profile_sections(profile).items():
+        text = truncate_to_tokens(text.strip(), budgets.get(name, 200))
+        if text:
+            lines.append(f"{name.capitalize()}:\n{text}")
+    return "\n\n".join(lines)
+
+
+def compact_job_desc(job_desc, budget=JOB_DESC_TOKEN_BUDGET):
+    # Renders a JobDesc summary as labelled bullet lists trimmed to a total token budget.
+    job_desc = job_desc or {}
+    lines = []
+    for field in JOB_FIELDS:
+        value = job_desc.get(field)
+        if not value:
+            continue
+        if isinstance(value, list):
+            lines.append(f"{field.replace('_', ' ').capitalize()}:\n" + "\n".join(f"- {v}" for v in value))
+        else:
+            lines.append(f"{field.replace('_', ' ').capitalize()}: {value}")
+    return truncate_to_tokens("\n\n".join(lines), budget)
+
+
+def compact_output(text, budget=PRIOR_OUTPUT_TOKEN_BUDGET):
+    # Trims an earlier node's output before it is re-sent to a downstream prompt.
+    return truncate_to_tokens(str(text or ""), budget)
+
+
+def prompt_token_report(profile):
+    # Returns raw vs. compact token counts for a profile, to show how much projection saves per prompt.
+    raw, compact = count_tokens(str(profile)), count_tokens(compact_profile(profile))
+    return {"raw_profile": raw, "compact_profile": compact, "saved": raw - compact}
@@ -0,0 +1,55 @@
+import asyncio
+import os
+import threading
+import time
+
+# Process-wide request rates (requests per second); 0 disables the limit.
+SCRAPINGDOG_RATE_LIMIT = float(os.getenv("SCRAPINGDOG_RATE_LIMIT", "0"))
+LLM_RATE_LIMIT = float(os.getenv("LLM_RATE_LIMIT", "0"))
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket shared by every caller in the process.
+    Tokens refill at rate per second up to burst; each acquire takes one token and waits until it is available.
+    Waiting callers reserve their token up front, so they are released in arrival order at the configured rate.
+    """
+
+    def __init__(self, rate=0.0, burst=None):
+        self._lock = threading.Lock()
+        self.configure(rate, burst)
+
+    def configure(self, rate, burst=None):
+        # Changes the rate (and burst, which defaults to one second's worth of tokens) for all later acquires.
+        with self._lock:
+            self.rate = float(rate or 0)
+            self.burst = float(burst) if burst else max(self.rate, 1.0)
+            self._tokens = self.burst
+            self._updated = time.monotonic()
+
+    def _reserve(self):
+        # Takes one token and returns how long the caller has to wait for it.
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    async def aacquire(self):
+        wait = self._reserve()
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+
+scrapingdog_limiter = RateLimiter(SCRAPINGDOG_RATE_LIMIT)
+llm_limiter = RateLimiter(LLM_RATE_LIMIT)
@@ -0,0 +1,141 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from utils.checkpoint_store import CHECKPOINT_DB_PATH, ThreadLocalConnections
+
+# Results live in their own indexed tables, in the checkpoint DB unless RESULTS_DB_PATH points elsewhere.
+RESULTS_DB_PATH = os.getenv("RESULTS_DB_PATH", CHECKPOINT_DB_PATH)
+LEGACY_RESULTS_JSON = "linkedin_optimizer_results.json"
+HISTORY_LIMIT = int(os.getenv("RESULTS_HISTORY_LIMIT", "10"))
+# Graph state keys saved as a result.
+RESULT_KEYS = ("analysis", "fit", "rewrite", "counseling", "fit_score")
+
+
+class ResultsStore:
+    """
+    Per-email optimization results with history.
+    Every save appends a row to results (indexed by email) and repoints latest_results in the same transaction,
+    so reads of the latest result are a single primary-key lookup and concurrent sessions never rewrite
+    each other's data.
+    """
+
+    def __init__(self, path=RESULTS_DB_PATH):
+        self.path = path
+        self._conn = ThreadLocalConnections(path)
+        conn = self._conn()
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS results (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                email TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                result TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS results_email_id ON results (email, id);
+            CREATE TABLE IF NOT EXISTS latest_results (
+                email TEXT PRIMARY KEY,
+                result_id INTEGER NOT NULL REFERENCES results (id)
+            );
+            """
+        )
+        conn.commit()
+
+    def save(self, email, result, created_at=None):
+        """
+        Atomically appends a result for email and makes it the latest one. Returns the new result id.
+        """
+        conn = self._conn()
+        with conn:
+            cur = conn.execute(
+                "INSERT INTO results (email, created_at, result) VALUES (?, ?, ?)",
+                (email, created_at or time.time(), json.dumps(result, default=str)),
+            )
+            result_id = cur.lastrowid
+            conn.execute(
+                "INSERT INTO latest_results (email, result_id) VALUES (?, ?) "
+                "ON CONFLICT(email) DO UPDATE SET result_id = excluded.result_id",
+                (email, result_id),
+            )
+        return result_id
+
+    def latest(self, email):
+        # Returns the most recent result for email, or None.
+        row = self._conn().execute(
+            "SELECT r.result FROM latest_results l JOIN results r ON r.id = l.result_id WHERE l.email = ?",
+            (email,),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def history(self, email, limit=HISTORY_LIMIT):
+        # Returns up to limit previous results for email, newest first, as dicts with id, created_at and result.
+        rows = self._conn().execute(
+            "SELECT id, created_at, result FROM results WHERE email = ? ORDER BY id DESC LIMIT ?",
+            (email, limit),
+        ).fetchall()
+        return [{"id": row[0], "created_at": row[1], "result": json.loads(row[2])} for row in rows]
+
+    def migrate_json(self, path=LEGACY_RESULTS_JSON):
+        """
+        Imports the legacy whole-file JSON results ({email: result}) and renames the file to <path>.migrated.
+        Emails that already have results in the store are skipped. Returns the number of imported results.
+        """
+        if not os.path.exists(path):
+            return 0
+        with open(path, "r") as f:
+            all_results = json.load(f)
+        imported = 0
+        created_at = os.path.getmtime(path)
+        for email, result in all_results.items():
+            if self.latest(email) is None:
+                self.save(email, result, created_at=created_at)
+                imported += 1
+        os.replace(path, f"{path}.migrated")
+        return imported
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_results_store():
+    # Returns the process-wide results store, migrating the legacy JSON file on first use.
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ResultsStore()
+            migrated = _store.migrate_json()
+            if migrated:
+                print(f"Migrated {migrated} results from {LEGACY_RESULTS_JSON}")
+        return _store
+
+
+def load_previous(compiled, email):
+    """
+    Returns the latest result for email from its checkpoint thread in compiled or the results store, whichever is
+    newer, as {"source", "result", "created_at", "history"} (plus "checkpoint_id" for checkpoints); None when there
+    is nothing. The store can be ahead of the checkpoint, e.g. for an email that joined another email's service job.
+    """
+    snapshot = compiled.get_state({"configurable": {"thread_id": email}})
+    history = get_results_store().history(email)
+    if snapshot.values:
+        result = {key: snapshot.values.get(key) for key in RESULT_KEYS}
+        # Every run saves its result to the store just after checkpointing it, so only a newer stored result that
+        # differs from the checkpoint comes from another run.
+        if not (
+            history
+            and history[0]["created_at"] > datetime.fromisoformat(snapshot.created_at).timestamp()
+            and {key: history[0]["result"].get(key) for key in RESULT_KEYS} != json.loads(json.dumps(result, default=str))
+        ):
+            return {
+                "source": "checkpoint",
+                "result": result,
+                "checkpoint_id": snapshot.config["configurable"].get("checkpoint_id"),
+                "created_at": snapshot.created_at,
+                "history": history,
+            }
+    if history:
+        return {"source": "results", "result": history[0]["result"], "created_at": history[0]["created_at"], "history": history}
+    return None
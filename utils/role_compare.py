@@ -0,0 +1,114 @@
+"""
+Multi-role comparison: ranks how well one profile fits several target roles and experience levels.
+
+The profile is fetched and analyzed once while every role's job summary is built concurrently. All roles are
+scored against the profile in one batch, and only the top-K roles get the fit explanation, rewrite and
+counseling LLM calls; the others are ranked by their computed fit score alone.
+"""
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.fit_scoring import score_profile_against_jobs
+from utils.job_market import get_job_summary, normalize_role
+from utils.llm_chain import analyze_profile, build_fit_prompt, career_counseling, generate, rewrite_sections
+from utils.scraper import fetch_profile
+from utils.telemetry import span, traced
+
+# Roles that get the full optimization (fit explanation, rewrite and counseling).
+COMPARE_TOP_K = int(os.getenv("COMPARE_TOP_K", "2"))
+# Job summaries built, and top roles optimized, in parallel.
+COMPARE_CONCURRENCY = int(os.getenv("COMPARE_CONCURRENCY", "4"))
+COMPARE_MAX_TARGETS = int(os.getenv("COMPARE_MAX_TARGETS", "10"))
+
+
+def _submit(executor, func, *args):
+    # Runs func in a copy of the caller's context, so cache_mode() and telemetry spans carry over to the worker.
+    return executor.submit(contextvars.copy_context().run, func, *args)
+
+
+def _run_node(name, func, state):
+    with span(f"node.{name}", kind="node"):
+        return func(state)
+
+
+def unique_targets(targets):
+    # Drops empty roles and repeated (role, exp_level) pairs, comparing roles the way the job summary store keys them.
+    seen, unique = set(), []
+    for role, exp_level in targets:
+        key = (normalize_role(role), exp_level)
+        if role.strip() and key not in seen:
+            seen.add(key)
+            unique.append((role.strip(), exp_level))
+    return unique
+
+
+def _analyze(profile_url):
+    profile = fetch_profile(profile_url)
+    if not profile:
+        raise RuntimeError("Profile could not be fetched")
+    return profile, _run_node("analysis", analyze_profile, {"profile": profile})["analysis"]
+
+
+def _explain_fit(state, fit_score):
+    # The fit node's prompt, reusing the score computed for the ranking instead of scoring the role again.
+    with span("node.fit", kind="node"):
+        return {"fit": generate("fit", build_fit_prompt(state, fit_score))}
+
+
+def _optimize_role(profile, analysis, row):
+    # Fit explanation and rewrite run in parallel (both read only the inputs), then counseling on all three.
+    state = {"profile": profile, "job_desc": row["job_desc"], "analysis": analysis}
+    with span("compare.role", kind="compare", target_role=row["target_role"], exp_level=row["exp_level"]):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            fit = _submit(executor, _explain_fit, state, row["fit_score"])
+            rewrite = _submit(executor, _run_node, "rewrite", rewrite_sections, state)
+            state.update(fit.result())
+            state.update(rewrite.result())
+        state.update(_run_node("counseling", career_counseling, state))
+    return {key: state[key] for key in ("fit", "rewrite", "counseling")}
+
+
+@traced(kind="compare")
+def compare_roles(profile_url, targets, top_k=COMPARE_TOP_K, max_concurrency=COMPARE_CONCURRENCY):
+    """
+    Compares the profile at profile_url against every (target_role, exp_level) in targets.
+    Returns {"profile", "analysis", "roles"}, where roles are ranked by fit score, each with its rank, job summary
+    and FitScore; the top_k roles also carry "fit", "rewrite" and "counseling". Roles whose job summary could not
+    be built are ranked last with an "error" and no score.
+    """
+    targets = unique_targets(targets)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(targets))) + 1) as executor:
+        # The profile analysis gets its own worker, so it runs while the job summaries are being built.
+        analyzed = _submit(executor, _analyze, profile_url)
+        summaries = [_submit(executor, get_job_summary, role, exp_level) for role, exp_level in targets]
+        rows = []
+        for (role, exp_level), future in zip(targets, summaries):
+            row = {"target_role": role, "exp_level": exp_level, "job_desc": None, "fit_score": None, "score": None, "error": None}
+            try:
+                row["job_desc"] = future.result() or None
+                if row["job_desc"] is None:
+                    row["error"] = "No job summary could be built"
+            except Exception as e:
+                row["error"] = str(e)
+            rows.append(row)
+        profile, analysis = analyzed.result()
+
+    scored = [row for row in rows if row["job_desc"]]
+    for row, fit_score in zip(scored, score_profile_against_jobs(profile, [row["job_desc"] for row in scored])):
+        row["fit_score"] = fit_score
+        row["score"] = fit_score["score"]
+    ranked = sorted(scored, key=lambda row: -row["score"]) + [row for row in rows if not row["job_desc"]]
+    for rank, row in enumerate(ranked, start=1):
+        row["rank"] = rank
+
+    top = ranked[:min(top_k, len(scored))]
+    if top:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(top)))) as executor:
+            outputs = [_submit(executor, _optimize_role, profile, analysis, row) for row in top]
+            for row, future in zip(top, outputs):
+                try:
+                    row.update(future.result())
+                except Exception as e:
+                    row["error"] = str(e)
+    return {"profile": profile, "analysis": analysis, "roles": ranked}
@@ -1,85 +1,187 @@
 import requests
 import json
 import re
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from langchain_openai import ChatOpenAI
 from langchain.schema import HumanMessage
 from pydantic import BaseModel
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
 from typing import List
 import os
 from dotenv import load_dotenv
+from utils.cache import ResponseCache, cached_completion, get_cache_mode, register_cache
+from utils.job_corpus import job_corpus
+from utils.rate_limit import scrapingdog_limiter
+from utils.telemetry import annotate, span, traced
+from utils.tokens import count_tokens, truncate_to_tokens
 
 load_dotenv()
 api_key = os.getenv("SCRAPPING_API_KEY")
 
+# ScrapingDog client settings; the base URL can be pointed at a local stub server.
+BASE_URL = os.getenv("SCRAPINGDOG_BASE_URL", "https://api.scrapingdog.com").rstrip("/")
+MAX_CONCURRENCY = int(os.getenv("SCRAPINGDOG_MAX_CONCURRENCY", "5"))
+# Keep-alive connections kept in the shared pool. Every caller in the process (app sessions, service and batch
+# workers, the background crawler) draws from it, so it is sized for all of them, not for one call's concurrency.
+POOL_SIZE = int(os.getenv("SCRAPINGDOG_POOL_SIZE", "50"))
+MAX_RETRIES = int(os.getenv("SCRAPINGDOG_MAX_RETRIES", "3"))
+BACKOFF_FACTOR = float(os.getenv("SCRAPINGDOG_BACKOFF_FACTOR", "0.5"))
+REQUEST_TIMEOUT = float(os.getenv("SCRAPINGDOG_TIMEOUT", "60"))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+DEFAULT_GEOID = "106300413"
+MAX_LISTING_PAGES = int(os.getenv("SCRAPINGDOG_MAX_LISTING_PAGES", "10"))
+
+# Map-reduce job description extraction settings.
+EXTRACTION_CHUNK_TOKENS = int(os.getenv("EXTRACTION_CHUNK_TOKENS", "6000"))
+EXTRACTION_CONCURRENCY = int(os.getenv("EXTRACTION_CONCURRENCY", "4"))
+SIMILARITY_THRESHOLD = float(os.getenv("EXTRACTION_SIMILARITY_THRESHOLD", "0.8"))
+
+def build_session(pool_size=POOL_SIZE, max_retries=MAX_RETRIES, backoff_factor=BACKOFF_FACTOR):
+    # Builds a requests Session whose connection pool is shared by every ScrapingDog call.
+    # Keeps TCP/TLS connections alive between calls and retries 429/5xx responses with exponential backoff,
+    # honouring any Retry-After header sent by the API.
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(pool_size, 1), max_retries=retry)
+    new_session = requests.Session()
+    new_session.mount("http://", adapter)
+    new_session.mount("https://", adapter)
+    return new_session
+
+session = build_session()
+response_cache = register_cache("scrape", ResponseCache())
+
+def _get(path, params):
+    # Issues a GET against the ScrapingDog API through the shared pooled session, within the global request rate limit.
+    # Recorded as a telemetry span with the status code, the retries urllib3 made and the time spent rate limited.
+    with span(f"scrapingdog{path}", kind="http") as s:
+        s.set(rate_limit_wait_s=scrapingdog_limiter.acquire())
+        response = session.get(f"{BASE_URL}{path}", params={"api_key": api_key, **params}, timeout=REQUEST_TIMEOUT)
+        retries = getattr(getattr(response.raw, "retries", None), "history", ())
+        s.set(status=response.status_code, retries=len(retries))
+    return response
+
+@traced(kind="scraper")
 def fetch_profile(linkedin_id):
     # Fetches LinkedIn profile data for a given LinkedIn ID using the ScrapingDog API.
-    # On successful response, saves the profile data to a local JSON file for caching and returns the data as a dictionary.
+    # Serves the profile from the response cache when a fresh copy exists, otherwise scrapes it and caches the result.
+    # Follows the cache mode like LLM completions do, so regenerating ("refresh") picks up profile edits made since.
     # Handles HTTP errors gracefully and returns None if the request fails.
-    url = "https://api.scrapingdog.com/linkedin"
     params = {
-        "api_key": api_key,
         "type": "profile",
         "linkId": linkedin_id,
         "premium": "false"
     }
-    response = requests.get(url, params=params)
+    mode = get_cache_mode()
+    cached = response_cache.get("profile", params) if mode == "use" else None
+    annotate(cache_hit=cached is not None)
+    if cached is not None:
+        return cached
+    response = _get("/linkedin", params)
     if response.status_code == 200:
         data = response.json()
-        with open(f"profile.json", "w") as f:
-            json.dump(data, f, indent=4)
+        if mode != "bypass":
+            response_cache.set("profile", params, data)
         return data
     else:
         print(f"Request failed with status code: {response.status_code}")
         return None
 
-def fetch_job_listings(field,exp_level="associate"):
-    # Retrieves a list of job postings from the ScrapingDog API for a specified field and experience level.
-    # Returns the job listings as a JSON object if the request is successful, otherwise returns an empty list.
-    url = "https://api.scrapingdog.com/linkedinjobs"
+@traced(kind="scraper")
+def fetch_job_listings(field,exp_level="associate", geoid=DEFAULT_GEOID, page=1):
+    # Retrieves a list of job postings from the ScrapingDog API for a specified field, experience level, geo and page.
+    # Returns the job listings as a JSON object (from the response cache when fresh) if successful, otherwise returns an empty list.
     params = {
-        "api_key": api_key,
         "field": field,
-        "geoid": "106300413",
-        "page": 1,
+        "geoid": geoid,
+        "page": page,
         "sort_by": "day",
         "job_type": "full_time",
         "exp_level": exp_level,
     }
-    response = requests.get(url, params=params)
+    cached = response_cache.get("job_listings", params)
+    annotate(cache_hit=cached is not None)
+    if cached is not None:
+        return cached
+    response = _get("/linkedinjobs", params)
     if response.status_code == 200:
-        return response.json()
+        data = response.json()
+        if data:
+            response_cache.set("job_listings", params, data)
+        return data
     else:
         print(f"Request failed with status code: {response.status_code}")
         return []
 
+@traced(kind="scraper")
 def fetch_job_overview(job_id):
     # Fetches detailed job overview information for a specific job ID using the ScrapingDog API.
-    # Returns the job overview as a dictionary if successful, otherwise returns an empty dictionary.
-    url = "https://api.scrapingdog.com/linkedinjobs"
+    # Returns the job overview (from the response cache when fresh) as a dictionary if successful, otherwise returns an empty dictionary.
     params = {
-        "api_key": api_key,
         "job_id": job_id
     }
-    response = requests.get(url, params=params)
+    cached = response_cache.get("job_overview", params)
+    annotate(cache_hit=cached is not None)
+    if cached is not None:
+        return cached
+    response = _get("/linkedinjobs", params)
     if response.status_code == 200:
-        return response.json()
+        data = response.json()
+        if data:
+            response_cache.set("job_overview", params, data)
+        return data
     else:
         print(f"Request failed with status code: {response.status_code}")
         return {}
 
-def fetch_top_job_overviews(field, exp_level,top_n=5):
+@traced(kind="scraper")
+def fetch_top_job_overviews(field, exp_level,top_n=5, max_concurrency=MAX_CONCURRENCY, geoid=DEFAULT_GEOID):
     # Retrieves the top N job overviews for a given field and experience level.
-    # Aggregates job IDs from job listings and fetches their overviews, handling both list and dict response formats.
-    # Returns a list of dictionaries containing job_id, job_position, and job_description for each job.
-    jobs = fetch_job_listings(field,exp_level)
-    if not jobs or not isinstance(jobs, list):
+    # Aggregates job IDs from as many listing pages as needed to reach top_n and fetches their overviews concurrently (at most max_concurrency in flight),
+    # handling both list and dict response formats, and adds them to the local job corpus.
+    # Returns a list of dictionaries containing job_id, job_position, job_description, company_name and job_location for each job, in listing order.
+    job_ids = []
+    for page in range(1, MAX_LISTING_PAGES + 1):
+        jobs = fetch_job_listings(field,exp_level, geoid=geoid, page=page)
+        if not jobs or not isinstance(jobs, list):
+            break
+        for job in jobs:
+            if isinstance(job, dict) and "job_id" in job and job["job_id"] not in job_ids:
+                job_ids.append(job["job_id"])
+        if len(job_ids) >= top_n:
+            break
+    job_ids = job_ids[:top_n]
+    if not job_ids:
         print("No jobs found or invalid response format.")
         return []
+    overviews = fetch_job_overviews(job_ids, max_concurrency)
+    # Every fetched posting is kept in the local job corpus, so later summaries can be built without scraping.
+    job_corpus.add(overviews, field, exp_level, geoid)
+    return overviews
+
+def fetch_job_overviews(job_ids, max_concurrency=MAX_CONCURRENCY):
+    # Fetches the overviews of job_ids concurrently (at most max_concurrency in flight).
+    # Returns a list of dictionaries containing job_id, job_position, job_description, company_name and job_location,
+    # in job_ids order, skipping jobs whose overview could not be fetched.
+    if not job_ids:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(job_ids)))) as executor:
+        # Each fetch runs in a copy of the caller's context so its telemetry span joins the caller's trace.
+        contexts = [contextvars.copy_context() for _ in job_ids]
+        fetched = list(executor.map(lambda ctx, job_id: ctx.run(fetch_job_overview, job_id), contexts, job_ids))
 
-    job_ids = [job["job_id"] for job in jobs[:top_n] if isinstance(job, dict) and "job_id" in job]
     overviews = []
-    for job_id in job_ids:
-        overview = fetch_job_overview(job_id)
+    for job_id, overview in zip(job_ids, fetched):
         # overview can be a list or dict, handle both
         if isinstance(overview, list) and len(overview) > 0:
             overview = overview[0]
@@ -87,7 +189,9 @@ def fetch_top_job_overviews(field, exp_level,top_n=5):
             overviews.append({
                 "job_id": job_id,
                 "job_position": overview.get("job_position", ""),
-                "job_description": overview.get("job_description", "")
+                "job_description": overview.get("job_description", ""),
+                "company_name": overview.get("company_name", ""),
+                "job_location": overview.get("job_location", ""),
             })
         else:
             print(f"Failed to fetch overview or missing fields for job ID: {job_id}")
@@ -112,14 +216,26 @@ def extract_json_from_response(response_text):
         return match.group(0)
     return response_text
 
-def evaluate_job_descriptions(field, exp_level,top_n=5):
-    # Aggregates and analyzes job descriptions for a given field and experience level.
-    # Fetches the top N job overviews, combines their descriptions, and uses an LLM to extract and deduplicate key job requirements.
-    # Returns a structured dictionary summarizing skills, responsibilities, qualifications, industry practices, and highlights.
-    overviews = fetch_top_job_overviews(field, exp_level,top_n)
-    all_descriptions = [overview.get("job_description", "") for overview in overviews if overview.get("job_description")]
-    combined_descriptions = "\n\n".join(all_descriptions)
+def chunk_descriptions(descriptions, token_budget=EXTRACTION_CHUNK_TOKENS):
+    # Packs job descriptions into chunks of at most token_budget tokens, keeping each posting whole where possible.
+    # A single posting longer than the budget is truncated to fit its own chunk.
+    chunks, current, current_tokens = [], [], 0
+    for description in descriptions:
+        description = truncate_to_tokens(description, token_budget)
+        tokens = count_tokens(description)
+        if current and current_tokens + tokens > token_budget:
+            chunks.append("\n\n".join(current))
+            current, current_tokens = [], 0
+        current.append(description)
+        current_tokens += tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
 
+@traced(kind="scraper")
+def extract_job_requirements(combined_descriptions):
+    # Map step: uses the LLM to extract skills, responsibilities, qualifications, industry practices and highlights
+    # from one chunk of job descriptions. Returns the parsed dictionary, or an empty dictionary if parsing fails.
     prompt = f"""
         You are an expert assistant. Analyze the following job descriptions and extract:
         - skills (deduplicate and merge similar/overlapping skills, use standard names)
@@ -135,26 +251,92 @@ def evaluate_job_descriptions(field, exp_level,top_n=5):
         {combined_descriptions}
         \"\"\"
         """
-    resp = llm([HumanMessage(content=prompt)])
-    json_str = extract_json_from_response(resp.content)
+    content = cached_completion(llm, prompt, lambda: llm.invoke([HumanMessage(content=prompt)]).content, label="job_summary")
+    json_str = extract_json_from_response(content)
     try:
         data = json.loads(json_str)
         # Remove unwanted fields if present
         for key in ["company", "position", "job_id"]:
             data.pop(key, None)
-        # Deduplicate lists if LLM missed it
-        for k, v in data.items():
-            if isinstance(v, list):
-                # Lowercase and strip for better deduplication
-                seen = set()
-                deduped = []
-                for item in v:
-                    norm = item.strip().lower()
-                    if norm not in seen:
-                        deduped.append(item)
-                        seen.add(norm)
-                data[k] = deduped
         return data
     except Exception as e:
-        print(f"Error parsing evaluation response: {e}\nRaw response:\n{resp.content}")
+        print(f"Error parsing evaluation response: {e}\nRaw response:\n{content}")
+        return {}
+
+def _normalize_item(item):
+    # Splits into the same tokens as fit_scoring._tokens (without stemming), keeping "+", "#" and "." inside
+    # tokens so that C, C++, C# and .NET stay different items.
+    return " ".join(re.findall(r"[a-z0-9+#.]*[a-z0-9+#]", str(item).lower()))
+
+def _symbol_tokens(norm):
+    # Tokens such as "c++" or "c#", which are close in characters to "c" but name a different skill.
+    return frozenset(token for token in norm.split() if "+" in token or "#" in token)
+
+def merge_similar_items(items, threshold=SIMILARITY_THRESHOLD):
+    # Merges near-duplicate strings (e.g. "Python programming" / "Python Programming." / "python programing").
+    # Items are compared by cosine similarity of character n-gram TF-IDF vectors; the most frequently mentioned
+    # spelling of each group is kept. Items naming different "+"/"#" skills (C, C++, C#) are never merged.
+    # Returns the merged items ordered by how many chunks mentioned them.
+    counts = {}
+    for item in items:
+        if not isinstance(item, str):
+            item = str(item)
+        item = item.strip()
+        norm = _normalize_item(item)
+        if not norm:
+            continue
+        entry = counts.setdefault(norm, [item, 0])
+        entry[1] += 1
+    if len(counts) <= 1:
+        return [text for text, _ in counts.values()]
+
+    norms = sorted(counts, key=lambda n: -counts[n][1])
+    vectors = TfidfVectorizer(analyzer="char_wb", ngram_range=(2, 4)).fit_transform(norms)
+    similarity = cosine_similarity(vectors)
+    symbols = [_symbol_tokens(norm) for norm in norms]
+    representative = list(range(len(norms)))
+    groups = {}
+    for i in range(len(norms)):
+        for j in groups:
+            if similarity[i, j] >= threshold and symbols[i] == symbols[j]:
+                representative[i] = j
+                break
+        else:
+            groups[i] = 0
+        groups[representative[i]] += counts[norms[i]][1]
+    ranked = sorted(groups, key=lambda i: -groups[i])
+    return [counts[norms[i]][0] for i in ranked]
+
+def merge_extractions(extractions, threshold=SIMILARITY_THRESHOLD):
+    # Reduce step: concatenates each list field across chunk extractions and merges near-duplicates.
+    merged = {}
+    for extraction in extractions:
+        for key, value in extraction.items():
+            if isinstance(value, list):
+                merged.setdefault(key, []).extend(value)
+            elif key not in merged:
+                merged[key] = value
+    return {key: merge_similar_items(value, threshold) if isinstance(value, list) else value for key, value in merged.items()}
+
+@traced(kind="scraper")
+def evaluate_job_descriptions(field, exp_level,top_n=5, geoid=DEFAULT_GEOID):
+    # Aggregates and analyzes job descriptions for a given field and experience level.
+    # Fetches the top N job overviews, packs their descriptions into token-budgeted chunks, extracts key job
+    # requirements from each chunk in parallel (map), and merges near-duplicate entries across chunks (reduce).
+    # Returns a structured dictionary summarizing skills, responsibilities, qualifications, industry practices, and highlights.
+    overviews = fetch_top_job_overviews(field, exp_level,top_n, geoid=geoid)
+    all_descriptions = [overview.get("job_description", "") for overview in overviews if overview.get("job_description")]
+    return summarize_descriptions(all_descriptions)
+
+@traced(kind="scraper")
+def summarize_descriptions(descriptions):
+    # Map-reduce summary of any number of job descriptions: token-budgeted chunks are extracted in parallel (map)
+    # and near-duplicate entries are merged across chunks (reduce). Returns an empty dictionary for no descriptions.
+    chunks = chunk_descriptions(descriptions)
+    if not chunks:
         return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(EXTRACTION_CONCURRENCY, len(chunks)))) as executor:
+        # Each chunk runs in a copy of the caller's context so cache_mode() applies to the map step.
+        contexts = [contextvars.copy_context() for _ in chunks]
+        extractions = [data for data in executor.map(lambda ctx, chunk: ctx.run(extract_job_requirements, chunk), contexts, chunks) if data]
+    return merge_extractions(extractions)
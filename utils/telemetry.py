@@ -0,0 +1,326 @@
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from utils.tokens import count_tokens
+
+# Comma-separated exporters enabled at import: "jsonl" and/or "prometheus".
+TELEMETRY_EXPORTERS = os.getenv("TELEMETRY_EXPORTERS", "")
+TELEMETRY_JSONL_PATH = os.getenv("TELEMETRY_JSONL_PATH", "telemetry.jsonl")
+# Port for the Prometheus /metrics endpoint; 0 keeps the metrics in-process only (PrometheusExporter.render()).
+TELEMETRY_PROMETHEUS_PORT = int(os.getenv("TELEMETRY_PROMETHEUS_PORT", "0"))
+# USD per million tokens; override with LLM_PRICES='{"gpt-4o-mini": {"prompt": 0.15, "completion": 0.6}}'.
+LLM_PRICES = {"gpt-4o-mini": {"prompt": 0.15, "completion": 0.60}}
+LLM_PRICES.update(json.loads(os.getenv("LLM_PRICES", "{}")))
+DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_current_span = contextvars.ContextVar("telemetry_span", default=None)
+_current_trace = contextvars.ContextVar("telemetry_trace", default=None)
+_exporters = []
+
+
+class Span:
+    """
+    One timed operation (a scraper call, an HTTP request, an LLM call, a graph node) with free-form attributes
+    such as token counts, cost, retries and cache hits. The parent is the span that was active when it started,
+    including across threads that run in a copied context.
+    """
+
+    def __init__(self, name, kind, parent=None, attributes=None):
+        self.name = name
+        self.kind = kind
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = dict(attributes or {})
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.duration = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def finish(self):
+        self.duration = time.perf_counter() - self._started
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            **self.attributes,
+        }
+
+
+class Trace:
+    """
+    Collects every span finished while it is active, e.g. all the work behind one "Analyze Profile" click.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.spans = []
+        self.started_at = time.time()
+        self.duration = None
+        self._lock = threading.Lock()
+
+    def add(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def rows(self):
+        # One dict per span in start order, for tables and logs.
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.started_at)
+        return [s.to_dict() for s in spans]
+
+    def totals(self):
+        """
+        Returns wall time and LLM token, cost, retry and cache-hit totals over the trace's spans.
+        """
+        with self._lock:
+            spans = list(self.spans)
+        totals = defaultdict(int)
+        for s in spans:
+            attrs = s.attributes
+            for key in ("prompt_tokens", "completion_tokens", "cost_usd", "retries"):
+                if s.kind in ("llm", "http") and key in attrs:
+                    totals[key] += attrs[key]
+            if attrs.get("cache_hit"):
+                totals["cache_hits"] += 1
+        totals["wall_s"] = self.duration if self.duration is not None else time.time() - self.started_at
+        return {k: round(v, 6) if isinstance(v, float) else v for k, v in totals.items()}
+
+
+def current_span():
+    return _current_span.get()
+
+
+def annotate(**attributes):
+    # Sets attributes on the active span; a no-op outside any span.
+    s = _current_span.get()
+    if s is not None:
+        s.set(**attributes)
+
+
+def _emit(s):
+    active = _current_trace.get()
+    if active is not None:
+        active.add(s)
+    for exporter in list(_exporters):
+        try:
+            exporter.export(s)
+        except Exception as e:
+            print(f"Telemetry exporter {type(exporter).__name__} failed: {e}")
+
+
+@contextmanager
+def span(name, kind="internal", **attributes):
+    """
+    Times the enclosed block as a span. Exceptions are recorded in the "error" attribute and re-raised.
+    """
+    s = Span(name, kind, _current_span.get(), attributes)
+    token = _current_span.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.set(error=repr(e))
+        raise
+    finally:
+        _current_span.reset(token)
+        s.finish()
+        _emit(s)
+
+
+def traced(name=None, kind="function"):
+    """
+    Decorator running a sync or async function inside a span named after it.
+    """
+
+    def decorator(func):
+        span_name = name or func.__name__
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name, kind):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name, kind):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def trace(name):
+    # Collects the spans of everything run in the block (and in threads started with a copy of its context).
+    t = Trace(name)
+    token = _current_trace.set(t)
+    try:
+        yield t
+    finally:
+        _current_trace.reset(token)
+        t.duration = time.time() - t.started_at
+
+
+def llm_usage(model, prompt, completion, cache_hit=False):
+    """
+    Token counts and estimated cost (USD) of one completion. Cache hits cost nothing.
+    """
+    prompt_tokens, completion_tokens = count_tokens(prompt), count_tokens(str(completion))
+    prices = LLM_PRICES.get(model, {})
+    cost = 0.0 if cache_hit else (prompt_tokens * prices.get("prompt", 0) + completion_tokens * prices.get("completion", 0)) / 1e6
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "cost_usd": round(cost, 8), "cache_hit": cache_hit}
+
+
+def percentiles(samples, unit="s"):
+    """
+    Latency statistics of durations given in seconds, reported in `unit` ("s" or "ms") with keys such as p95_ms.
+    """
+    if not samples:
+        return {}
+    values = np.asarray(samples) * {"s": 1, "ms": 1000}[unit]
+    stats = {"mean": values.mean(), "p50": np.percentile(values, 50), "p95": np.percentile(values, 95),
+             "p99": np.percentile(values, 99), "max": values.max()}
+    return {"count": int(values.size), **{f"{key}_{unit}": round(float(value), 3) for key, value in stats.items()}}
+
+
+class JsonlExporter:
+    """
+    Appends every finished span as one JSON line to path.
+    """
+
+    def __init__(self, path=TELEMETRY_JSONL_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, s):
+        line = json.dumps(s.to_dict(), default=str)
+        with self._lock, open(self.path, "a") as f:
+            f.write(line + "\n")
+
+
+class PrometheusExporter:
+    """
+    Aggregates spans into Prometheus metrics: a duration histogram per span name and kind, plus counters for
+    LLM tokens, cost, HTTP retries, cache hits and errors. render() returns the text exposition format;
+    serve(port) exposes it on /metrics from a daemon thread.
+    """
+
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._histograms = defaultdict(lambda: [0] * (len(buckets) + 1) + [0.0])
+        self._counters = defaultdict(float)
+        self._server = None
+
+    def export(self, s):
+        labels = (("name", s.name), ("kind", s.kind))
+        attrs = s.attributes
+        with self._lock:
+            histogram = self._histograms[labels]
+            for i, bound in enumerate(self.buckets):
+                if s.duration <= bound:
+                    histogram[i] += 1
+            histogram[len(self.buckets)] += 1
+            histogram[-1] += s.duration
+            for key in ("prompt_tokens", "completion_tokens"):
+                if key in attrs:
+                    self._counters[("linkedin_llm_tokens_total", labels + (("type", key.split("_")[0]),))] += attrs[key]
+            if "cost_usd" in attrs:
+                self._counters[("linkedin_llm_cost_usd_total", labels)] += attrs["cost_usd"]
+            if attrs.get("retries"):
+                self._counters[("linkedin_http_retries_total", labels)] += attrs["retries"]
+            if attrs.get("cache_hit"):
+                self._counters[("linkedin_cache_hits_total", labels)] += 1
+            if "error" in attrs:
+                self._counters[("linkedin_span_errors_total", labels)] += 1
+
+    @staticmethod
+    def _labels(labels, extra=()):
+        return "{" + ",".join(f'{k}="{str(v).replace(chr(34), chr(39))}"' for k, v in (*labels, *extra)) + "}"
+
+    def render(self):
+        with self._lock:
+            histograms = {k: list(v) for k, v in self._histograms.items()}
+            counters = dict(self._counters)
+        lines = [
+            "# HELP linkedin_span_duration_seconds Duration of instrumented operations.",
+            "# TYPE linkedin_span_duration_seconds histogram",
+        ]
+        for labels, histogram in sorted(histograms.items()):
+            for bound, count in zip((*self.buckets, "+Inf"), histogram):
+                lines.append(f"linkedin_span_duration_seconds_bucket{self._labels(labels, (('le', bound),))} {count}")
+            lines.append(f"linkedin_span_duration_seconds_count{self._labels(labels)} {histogram[len(self.buckets)]}")
+            lines.append(f"linkedin_span_duration_seconds_sum{self._labels(labels)} {histogram[-1]}")
+        for metric in sorted({m for m, _ in counters}):
+            lines.append(f"# TYPE {metric} counter")
+            for (m, labels), value in sorted(counters.items()):
+                if m == metric:
+                    lines.append(f"{metric}{self._labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port=TELEMETRY_PROMETHEUS_PORT):
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                body = exporter.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="telemetry-metrics", daemon=True).start()
+        return self._server.server_port
+
+
+def register_exporter(exporter):
+    _exporters.append(exporter)
+    return exporter
+
+
+def unregister_exporter(exporter):
+    if exporter in _exporters:
+        _exporters.remove(exporter)
+
+
+def configure_from_env(exporters=TELEMETRY_EXPORTERS):
+    # Registers the exporters named in TELEMETRY_EXPORTERS; the Prometheus one is served if a port is set.
+    for name in filter(None, (n.strip() for n in exporters.split(","))):
+        if name == "jsonl":
+            register_exporter(JsonlExporter())
+        elif name == "prometheus":
+            exporter = register_exporter(PrometheusExporter())
+            if TELEMETRY_PROMETHEUS_PORT:
+                try:
+                    exporter.serve(TELEMETRY_PROMETHEUS_PORT)
+                except OSError as e:
+                    print(f"Prometheus metrics endpoint not started: {e}")
+        else:
+            print(f"Unknown telemetry exporter {name!r}")
+
+
+configure_from_env()
@@ -0,0 +1,53 @@
+import os
+import re
+import threading
+from functools import lru_cache
+
+import tiktoken
+
+TOKEN_MODEL = os.getenv("TOKEN_MODEL", "gpt-4o-mini")
+
+# Rough stand-in for BPE pieces, used when the tiktoken encoding files cannot be loaded (e.g. offline).
+_APPROX_PIECE = re.compile(r"\s*\w{1,4}|\s*[^\w\s]|\s+")
+_encoding_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _load_encoding():
+    try:
+        try:
+            return tiktoken.encoding_for_model(TOKEN_MODEL)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        print(f"tiktoken encoding unavailable, using approximate token counts: {e}")
+        return None
+
+
+def _encoding():
+    # Returns the tiktoken encoding for TOKEN_MODEL, or None if it cannot be loaded.
+    # The first load is serialized so parallel callers neither download the encoding twice nor each report a failure.
+    with _encoding_lock:
+        return _load_encoding()
+
+
+def count_tokens(text):
+    # Returns the number of tokens in text for TOKEN_MODEL.
+    if not text:
+        return 0
+    enc = _encoding()
+    if enc is None:
+        return len(_APPROX_PIECE.findall(text))
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text, budget):
+    # Trims text to at most budget tokens, returning it unchanged when it already fits.
+    if not text or budget <= 0:
+        return ""
+    enc = _encoding()
+    if enc is None:
+        pieces = _APPROX_PIECE.findall(text)
+        return text if len(pieces) <= budget else "".join(pieces[:budget])
+    tokens = enc.encode(text, disallowed_special=())
+    return text if len(tokens) <= budget else enc.decode(tokens[:budget])